@@ -1,10 +1,303 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import nullcontext
+
+from wbb import aggregates, cache, charts, clustering, figures, ingest, profiling, rollups, rosters, streaming, tasks
+from wbb.lookup import GroupIndex
+
+
+# 📥 **Lettura dei file: ogni contenuto viene analizzato una sola volta**
+# La chiave di cache è l'hash del contenuto, così i rerun e le altre sessioni
+# che caricano lo stesso file riusano il DataFrame già normalizzato. Sotto c'è
+# la cache colonnare su disco (wbb.cache), che sopravvive al riavvio del server.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _parse_stats(digest, _data):
+    profiling.miss()
+    return cache.load("stats", _data, digest)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _parse_roster(digest, _data):
+    profiling.miss()
+    return cache.load("roster", _data, digest)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _parse_teams(digest, _data):
+    profiling.miss()
+    return cache.load("teams", _data, digest)
+
+
+# I DataFrame in cache sono condivisi da tutte le sessioni: ogni sessione riceve
+# una vista (ingest.shared_view) che non duplica i dati e non può alterarli.
+def load_stats(file):
+    data = file.getvalue()
+    with profiling.timed("load_stats", cached=True):
+        return ingest.shared_view(_parse_stats(ingest.file_digest(data), data))
+
+
+@st.cache_resource(show_spinner=False)
+def _latest_roster_store():
+    # Ultimo store costruito: il successivo parte da una sua copia e aggiunge solo i file nuovi
+    return {}
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _shared_roster_store(key, _uploads):
+    profiling.miss()
+    latest = _latest_roster_store()
+    store = latest["store"].copy() if "store" in latest else rosters.RosterStore()
+    store.retain(_uploads)
+    for (digest, season), file in _uploads.items():
+        if (digest, season) not in store:
+            with profiling.timed(f"load_roster {file.name}", cached=True):
+                roster_df = _parse_roster(digest, file.getvalue())
+            with profiling.timed("roster_store.add"):
+                store.add(roster_df, digest, season=season)
+    latest["store"] = store
+    return store
+
+
+def roster_uploads(files):
+    # Un file di roster è (contenuto, stagione dal nome): gli stessi byte caricati
+    # come due stagioni sono due file diversi
+    uploads = {(ingest.file_digest(file.getvalue()), rosters.season_from_filename(file.name)): file for file in files}
+    key = tuple(sorted((digest, season or "") for digest, season in uploads))
+    return uploads, key
+
+
+def roster_store(files):
+    # Uno store per combinazione di file, condiviso in sola lettura da tutte le sessioni
+    uploads, key = roster_uploads(files)
+    with profiling.timed("roster_store", cached=True):
+        return _shared_roster_store(key, uploads)
+
+
+# 🌊 **Lettura a blocchi dei roster molto grandi**
+# I CSV vengono letti a blocchi che aggiornano conteggi e quartili, senza
+# tenere in memoria il DataFrame completo. Bastano per altezze, nuove
+# giocatrici, turnover, mappa e (con teams.csv) roster per conference. Nell'app
+# i blocchi non vengono scritti su disco: lo store su disco si crea con
+# ``python -m wbb.streaming``.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _streamed_rosters(key, teams_digest, _uploads, _teams_df):
+    profiling.miss()
+    result = streaming.RosterAggregates(_teams_df)
+    for (digest, season), file in _uploads.items():
+        with profiling.timed(f"stream_roster {file.name}"):
+            streaming.stream_roster(io.BytesIO(file.getvalue()), digest, season=season, into=result)
+    return result
+
+
+def streamed_rosters(files, teams_df=None):
+    # Con teams.csv la stessa lettura aggiorna anche il rollup per conference
+    uploads, key = roster_uploads(files)
+    teams_digest = teams_df.attrs["digest"] if teams_df is not None else None
+    with profiling.timed("streamed_rosters", cached=True):
+        result = _streamed_rosters(key, teams_digest, uploads, teams_df)
+    return result, ingest.file_digest(repr(key).encode())
+
+
+def load_teams(file):
+    data = file.getvalue()
+    with profiling.timed("load_teams", cached=True):
+        return ingest.shared_view(_parse_teams(ingest.file_digest(data), data))
+
+
+# 🌊 **Lettura a blocchi delle statistiche molto grandi**
+# Solo riepiloghi per giocatrice e squadra e rollup per conference: bastano a
+# clustering, confronto (barre e radar) e classifiche di conference. Le sezioni
+# che mostrano le singole partite (andamento, streak, momentum, 3D) restano
+# disponibili solo con il file completo.
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _streamed_stats(digest, teams_digest, _data, _teams_df):
+    profiling.miss()
+    with profiling.timed("stream_stats"):
+        return streaming.stream_stats(io.BytesIO(_data), digest, teams_df=_teams_df)
+
+
+def streamed_stats(file, teams_df=None):
+    data = file.getvalue()
+    teams_digest = teams_df.attrs["digest"] if teams_df is not None else None
+    with profiling.timed("streamed_stats", cached=True):
+        return _streamed_stats(ingest.file_digest(data), teams_digest, data, teams_df)
+
+
+# 📋 **Tabelle riassuntive per giocatrice e per squadra** (una volta per file)
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _summaries(digest, _stats_df):
+    profiling.miss()
+    with profiling.timed("groupby"):
+        return aggregates.summarize(_stats_df, "PLAYER_NAME"), aggregates.summarize(_stats_df, "TEAM_NAME")
+
+
+def stats_summaries(stats_df):
+    with profiling.timed("stats_summaries", cached=True):
+        return _summaries(stats_df.attrs["digest"], stats_df)
+
+
+# 🔎 **Indici per giocatrice e per squadra**: ogni selezione è una fetta, non un filtro
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _stats_indexes(digest, _stats_df):
+    profiling.miss()
+    return GroupIndex(_stats_df, "PLAYER_NAME"), GroupIndex(_stats_df, "TEAM_NAME", normalize=True)
+
+
+def stats_indexes(stats_df):
+    with profiling.timed("stats_indexes", cached=True):
+        return _stats_indexes(stats_df.attrs["digest"], stats_df)
+
+
+# 🏆 **Riepiloghi division → conference → squadra → giocatrice** (wbb.rollups)
+# Join con teams.csv e somme per livello calcolati una volta per coppia di file.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _stats_rollup(stats_digest, teams_digest, _stats_df, _teams_df):
+    profiling.miss()
+    with profiling.timed("rollup stats"):
+        joined = rollups.join_stats(_stats_df, _teams_df)
+        return rollups.stats_rollup(joined), rollups.coverage(joined)
+
+
+def stats_rollup(stats_df, teams_df):
+    with profiling.timed("stats_rollup", cached=True):
+        return _stats_rollup(stats_df.attrs["digest"], teams_df.attrs["digest"], stats_df, teams_df)
+
+
+@st.cache_resource(show_spinner=False)
+def _latest_roster_rollups():
+    # Ultimo rollup per teams.csv con le parti dello store che contiene: il successivo
+    # parte da una sua copia e aggiunge (o toglie) solo le parti cambiate
+    return {}
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _roster_rollup(roster_key, teams_digest, _store, _teams_df):
+    profiling.miss()
+    pieces = _store.pieces()
+    columns = [col for col in ["total_inches"] if any(col in piece.columns for piece in pieces.values())]
+    latest = _latest_roster_rollups()
+    included, rollup = latest.get(teams_digest, ({}, None))
+    if rollup is None or rollup.columns != columns:
+        included, rollup = {}, rollups.Rollup(rollups.ROSTER_LEVELS, columns)
+    else:
+        rollup = rollup.copy()
+
+    def joined(piece):
+        return rollups.join_roster(piece.reindex(columns=list(piece.columns.union(columns, sort=False))), _teams_df)
+
+    with profiling.timed("rollup roster"):
+        for name in included.keys() - pieces.keys():
+            rollup.remove(joined(included[name]))
+        for name in pieces.keys() - included.keys():
+            rollup.add(joined(pieces[name]))
+    latest[teams_digest] = (pieces, rollup)
+    return rollup
+
+
+def roster_rollup(store, teams_df):
+    with profiling.timed("roster_rollup", cached=True):
+        return _roster_rollup(store.fingerprint, teams_df.attrs["digest"], store, teams_df)
+
+
+# ⏳ **Calcoli pesanti in background**: KMeans, mappa e grafici 3D vanno nel pool condiviso
+# tra le sessioni (wbb.tasks). La pagina mostra subito le parti leggere e un segnaposto,
+# riempito appena il risultato è pronto; richieste identiche condividono lo stesso calcolo.
+@st.cache_resource(show_spinner=False)
+def background_pool():
+    return tasks.TaskPool(max_workers=int(os.environ.get("WBB_WORKERS", "4")))
+
+
+_deferred = []  # (nome, segnaposto, future, show, riusato) del rerun corrente
+
+
+def deferred(name, key, compute, show, *args):
+    """Invia ``compute(*args)`` al pool e mostra ``show(risultato)`` al suo posto quando è pronto."""
+    pool = background_pool()
+    with profiling.timed(f"submit {name}", cached=True):
+        reused = (name, key) in pool
+        if not reused:
+            profiling.miss()
+        # Il worker misura il proprio calcolo: il tempo arriva insieme al risultato
+        future = pool.submit((name, key), tasks.timed_call, compute, *args)
+    placeholder = st.empty()
+    if not future.done():
+        placeholder.info("⏳ Calcolo in corso...")
+    _deferred.append((name, placeholder, future, show, reused))
+
+
+def show_deferred():
+    # I segnaposto si riempiono nell'ordine in cui i calcoli finiscono. Ogni attesa
+    # finisce nel profilo come "wait <nome>", con i secondi di calcolo del worker e
+    # "hit" se il calcolo era già stato chiesto (da questa o da un'altra sessione)
+    pending = {future: (name, placeholder, show, reused) for name, placeholder, future, show, reused in _deferred}
+    _deferred.clear()
+    while pending:
+        with profiling.timed("wait", kind="wait", cached=True) as record:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            future = next(iter(done))
+            name, placeholder, show, reused = pending.pop(future)
+            error = future.exception()
+            if record is not None:
+                record["name"] = f"wait {name}"
+                record["cache"] = "hit" if reused else "miss"
+                record["compute"] = future.result()[1] if error is None else None
+        with profiling.timed(f"show {name}"):
+            if error is not None:
+                placeholder.exception(error)
+                continue
+            with placeholder.container():
+                show(future.result()[0])
+
+
+# 🧩 **Clustering**: si ricalcola solo se cambiano dati, k o metodo
+# Di default stessi dati -> stesso risultato (KMeans da zero con n_init=10).
+# Partire dai centroidi precedenti è una scelta esplicita della sessione: il
+# punto di partenza è l'ultimo modello che la sessione ha stimato su dati
+# diversi (es. il file di statistiche che quello nuovo estende), mai quello
+# di un'altra sessione.
+def player_clusters(player_means, k, method, show, warm_start=False):
+    features = clustering.player_features(player_means)
+    data_key = clustering.fingerprint(features)
+    key = (data_key, k, method)
+    previous = None
+    if warm_start:
+        latest = st.session_state.setdefault("latest_clusters", {})
+        seeds = st.session_state.setdefault("cluster_seeds", {})
+        if key not in seeds:
+            candidate = latest.get((k, method))
+            seeds[key] = candidate if candidate is not None and candidate.data_key != data_key else None
+        previous = seeds[key]
+        key += (previous.data_key if previous is not None else None,)
+
+    def show_and_remember(clusters):
+        if warm_start:
+            st.session_state["latest_clusters"][(k, method)] = clusters
+        show(clusters, key)
+
+    deferred("clusters", key, clustering.fit_clusters, show_and_remember, features, k, method, previous)
+
+
+# 🖼️ **Cache dei grafici**: ogni figura dipende solo da (grafico, selezione, impronta dei dati)
+# e viene ricostruita solo quando cambia uno di questi input.
+@st.cache_resource(show_spinner=False, max_entries=512)
+def _cached_figure(chart, key, _build):
+    profiling.miss()
+    return _build()
+
+
+def cached_figure(chart, key, _build):
+    with profiling.timed(f"figure {chart}", cached=True):
+        return _cached_figure(chart, key, _build)
+
+
+def plotly_chart(fig):
+    # La serializzazione della figura verso il browser avviene qui
+    with profiling.timed("plotly_chart"):
+        st.plotly_chart(fig)
+
 
 # Titolo dell'app
 st.title("**🏀 College Baskeball Analysis: just for fun!**")
@@ -16,316 +309,444 @@ teams_file = st.file_uploader("Carica il file CSV con i dati delle squadre", typ
 
 st.write("📊 **Carica i dati per iniziare!**")
 
+# ⚡ **Grafici aggregati**: mappe, box plot e scatter 3D inviano al browser dati già riassunti
+aggregate_charts = st.sidebar.checkbox("Grafici aggregati (più leggeri con molti dati)", value=True)
+point_budget = int(st.sidebar.number_input("Punti massimi per grafico", min_value=500, max_value=200000,
+                                           value=charts.DEFAULT_POINT_BUDGET, step=500))
+stream_rosters = st.sidebar.checkbox("Lettura a blocchi dei roster (file molto grandi)", value=False,
+                                     help="Roster e mappa usano solo aggregati: meno memoria, niente movimenti.")
+stream_stats = st.sidebar.checkbox("Lettura a blocchi delle statistiche (file molto grandi)", value=False,
+                                   help="Solo riepiloghi per giocatrice, squadra e conference: niente singole partite.")
+
+
+def optional_teams():
+    # teams.csv, se caricato: le letture a blocchi aggiornano anche i rollup per conference
+    return load_teams(teams_file) if teams_file else None
+
+
+def needs_full_stats():
+    st.info("Questa sezione usa le singole partite: disattiva la lettura a blocchi delle statistiche per vederla.")
+
+
 # 📌 **Punto 1: Analisi sui roster nel tempo**
-if roster_files:
-    df_rosters = []
-    for file in roster_files:
-        df = pd.read_csv(file)
-        df["season"] = file.name.split("_")[-1].replace(".csv", "")  # Estrai la stagione dal nome file
-        df_rosters.append(df)
+def render_rosters():
+    if not roster_files:
+        st.info("Carica i file CSV dei roster per questa sezione.")
+        return
+
+    if stream_rosters:
+        render_streamed_rosters()
+        return
+
+    # Una partizione per stagione (dal nome file, o dalla colonna "season" per gli archivi)
+    store = roster_store(roster_files)
+    roster_df = store.frame()
+    roster_key = store.fingerprint
     
-    roster_df = pd.concat(df_rosters)
-    roster_df.columns = roster_df.columns.str.strip().str.lower()
-    
-    # ✅ **Distribuzione delle altezze (box plot)**
-    fig_height = px.box(roster_df, x="season", y="total_inches", title="Distribuzione delle Altezze per Stagione")
-    st.plotly_chart(fig_height)
+    # ✅ **Distribuzione delle altezze (box plot)**, se i roster hanno l'altezza in pollici
+    if "total_inches" in roster_df.columns:
+        if aggregate_charts:
+            fig_height = cached_figure("height", (roster_key, True), lambda: charts.box_figure(
+                roster_df, "season", "total_inches", "Distribuzione delle Altezze per Stagione"))
+        else:
+            fig_height = cached_figure("height", (roster_key, False), lambda: px.box(
+                roster_df, x="season", y="total_inches", title="Distribuzione delle Altezze per Stagione"))
+        plotly_chart(fig_height)
     
     # ✅ **Numero di nuove giocatrici per squadra (bar chart)**
-    roster_df["new_player"] = ~roster_df.duplicated(subset=["player_id"], keep="first")
-    new_players_per_team = roster_df.groupby(["season", "team"])["new_player"].sum().reset_index()
-    fig_new_players = px.bar(new_players_per_team, x="season", y="new_player", color="team", 
-                             title="Nuove Giocatrici per Squadra", barmode="stack")
-    st.plotly_chart(fig_new_players)
+    # Flag "new_player" e conteggi per squadra sono già calcolati dallo store
+    team_counts = store.team_counts()
+    fig_new_players = cached_figure("new_players", roster_key, lambda: figures.new_players_bar(team_counts))
+    plotly_chart(fig_new_players)
 
     # ✅ **Turnover delle giocatrici per squadra (stacked bar chart)**
-    player_counts = roster_df.groupby(["season", "team"])["player_id"].count().reset_index()
-    fig_turnover = px.bar(player_counts, x="season", y="player_id", color="team", 
-                          title="Turnover delle Giocatrici per Squadra", barmode="stack")
-    st.plotly_chart(fig_turnover)
+    fig_turnover = cached_figure("turnover", roster_key, lambda: figures.turnover_bar(team_counts))
+    plotly_chart(fig_turnover)
+
+    # 🔁 **Movimenti tra stagioni**: confermate, arrivi, trasferimenti e partenze
+    # (calcolati dallo store una volta per stagione aggiunta, non a ogni rerun)
+    st.subheader("🔁 Movimenti tra stagioni")
+    team_moves = store.team_moves()
+    if team_moves.empty:
+        st.info("Carica almeno due stagioni per vedere i movimenti delle giocatrici.")
+        return
+
+    fig_moves = cached_figure("moves", roster_key, lambda: figures.moves_bar(
+        team_moves, "Movimenti delle Giocatrici per Stagione"))
+    plotly_chart(fig_moves)
+
+    selected_team = st.selectbox("🏀 Squadra:", sorted(team_moves["team"].unique()), key="moves_team")
+    team_rows = team_moves[team_moves["team"] == selected_team]
+    fig_team_moves = cached_figure("team_moves", (roster_key, selected_team), lambda: figures.moves_bar(
+        team_rows, f"Movimenti di {selected_team}"))
+    plotly_chart(fig_team_moves)
+
+    moves = store.moves()
+    arrivals = moves[(moves["to_school"] == selected_team) & (moves["status"] != "retained")]
+    departures = moves[(moves["from_school"] == selected_team) & moves["in_previous"]
+                       & moves["status"].isin(["transfer", "departing"])]
+    col_in, col_out = st.columns(2)
+    with col_in:
+        st.write("Arrivi (con scuola di provenienza)")
+        st.dataframe(arrivals[["season", "name", "status", "from_school"]], hide_index=True)
+    with col_out:
+        st.write("Partenze (con destinazione)")
+        st.dataframe(departures[["season", "name", "status", "to_school"]], hide_index=True)
+
+
+def render_streamed_rosters():
+    # Stessi grafici, ma da aggregati calcolati durante la lettura a blocchi
+    result, roster_key = streamed_rosters(roster_files, optional_teams())
+
+    heights = result.height_box()
+    if not heights.empty:
+        fig_height = cached_figure("height", (roster_key, "stream"), lambda: charts.box_stats_figure(
+            heights, "season", "total_inches", "Distribuzione delle Altezze per Stagione"))
+        plotly_chart(fig_height)
+
+    team_counts = result.team_counts()
+    fig_new_players = cached_figure("new_players", (roster_key, "stream"), lambda: figures.new_players_bar(team_counts))
+    plotly_chart(fig_new_players)
+    fig_turnover = cached_figure("turnover", (roster_key, "stream"), lambda: figures.turnover_bar(team_counts))
+    plotly_chart(fig_turnover)
+
+    st.info("I movimenti tra stagioni richiedono i roster completi: disattiva la lettura a blocchi per vederli.")
+
+
+# 🗺️ **Distribuzione geografica** (sezione pesante: calcolata solo se aperta)
+def render_geo():
+    if not roster_files:
+        st.info("Carica i file CSV dei roster per questa sezione.")
+        return
+
+    if stream_rosters:
+        # Conteggi per stato già pronti dalla lettura a blocchi
+        result, roster_key = streamed_rosters(roster_files, optional_teams())
+        counts = result.state_counts()
+        if not counts.empty:
+            plotly_chart(cached_figure("geo", (roster_key, "stream"), lambda: charts.geo_counts_figure(
+                counts, "Distribuzione Geografica delle Giocatrici")))
+        return
+
+    store = roster_store(roster_files)
+    roster_df = store.frame()
+    roster_key = store.fingerprint
 
     # ✅ **Distribuzione geografica delle giocatrici per anno (mappa interattiva)**
     if "hometown" in roster_df.columns and "state_clean" in roster_df.columns:
-        fig_geo = px.scatter_geo(roster_df, locations="state_clean", locationmode="USA-states", 
-                                 hover_name="hometown", title="Distribuzione Geografica delle Giocatrici")
-        st.plotly_chart(fig_geo)
+        if aggregate_charts:
+            # Una sola area per stato invece di un marker per giocatrice
+            deferred("geo", (roster_key, True), charts.geo_figure, plotly_chart,
+                     roster_df, "Distribuzione Geografica delle Giocatrici")
+        else:
+            deferred("geo", (roster_key, False), lambda: px.scatter_geo(
+                roster_df, locations="state_clean", locationmode="USA-states",
+                hover_name="hometown", title="Distribuzione Geografica delle Giocatrici"), plotly_chart)
 
-#st.write("📊 **Analisi sui roster completata!**")
 
 # 📌 **Punto 2: Analisi individuale delle giocatrici**
-if stats_file:
-    # Carichiamo i dati dal file
-    stats_df = pd.read_excel(stats_file, sheet_name="Sheet1")
-    stats_df.columns = stats_df.columns.str.strip().str.upper()  # Convertiamo le colonne in maiuscolo per uniformità
+def render_player():
+    if not stats_file:
+        st.info("Carica il file Excel con le statistiche per questa sezione.")
+        return
+
+    if stream_stats:
+        needs_full_stats()
+        return
+
+    # Carichiamo i dati dal file (colonne già in maiuscolo, DataFrame condiviso: non va modificato)
+    stats_df = load_stats(stats_file)
+    player_summary, team_summary = stats_summaries(stats_df)
+    player_index, _ = stats_indexes(stats_df)
+    stats_key = stats_df.attrs["digest"]
 
     st.header("📊 Analisi delle Statistiche Giocatrici")
 
     # 🔍 **Selezione della giocatrice**
-    players = stats_df["PLAYER_NAME"].unique()
+    players = player_index.keys
     selected_player = st.selectbox("Seleziona una giocatrice:", players)
 
     # 📊 **Andamento delle statistiche nel tempo**
-    player_stats = stats_df[stats_df["PLAYER_NAME"] == selected_player]
+    player_stats = player_index.get(selected_player)
     if not player_stats.empty:
-        fig_stats = px.line(player_stats, x="GAMES", y=["POINTS", "ASSISTS", "TOTAL_REBOUNDS"],
-                            title=f"Andamento delle Statistiche di {selected_player}", markers=True)
-        st.plotly_chart(fig_stats)
+        fig_stats = cached_figure("player_stats", (stats_key, selected_player), lambda: figures.player_stats_line(
+            player_stats, selected_player))
+        plotly_chart(fig_stats)
 
     # 🎯 **Mappa di tiro migliorata**
     if "FIELD_GOAL_PERCENTAGE" in stats_df.columns:
-        fig_shot_map = px.scatter(player_stats, x="FIELD_GOAL_ATTEMPTS", y="FIELD_GOAL_PERCENTAGE",
-                                  size="FIELD_GOALS_MADE", color="FIELD_GOAL_PERCENTAGE",
-                                  title=f"Mappa di tiro di {selected_player}")
-        st.plotly_chart(fig_shot_map)
+        fig_shot_map = cached_figure("shot_map", (stats_key, selected_player), lambda: figures.shot_map(
+            player_stats, selected_player))
+        plotly_chart(fig_shot_map)
 
     # 🆚 **Confronto giocatrice vs squadra**
     if "TEAM_NAME" in stats_df.columns:
-        team_avg = stats_df.groupby("TEAM_NAME")[["POINTS", "ASSISTS", "TOTAL_REBOUNDS"]].mean().reset_index()
         player_team = player_stats["TEAM_NAME"].iloc[0]
-        player_avg = player_stats[["POINTS", "ASSISTS", "TOTAL_REBOUNDS"]].mean()
-
-        team_vs_player = pd.DataFrame({
-            "Statistica": ["Punti", "Assist", "Rimbalzi"],
-            "Giocatrice": player_avg.values,
-            "Media Squadra": team_avg[team_avg["TEAM_NAME"] == player_team].iloc[:, 1:].values.flatten()
-        })
+        team_vs_player = aggregates.team_vs_player(player_summary, team_summary, selected_player, player_team)
 
-        fig_team_comp = px.bar(team_vs_player, x="Statistica", y=["Giocatrice", "Media Squadra"],
-                               title=f"Confronto {selected_player} vs Media Squadra", barmode="group")
-        st.plotly_chart(fig_team_comp)
+        fig_team_comp = cached_figure("team_comp", (stats_key, selected_player), lambda: figures.team_comparison_bar(
+            team_vs_player, selected_player))
+        plotly_chart(fig_team_comp)
 
     # 🔥 **Hot Streak & Cold Streak**
     st.header("🔥 Hot & Cold Streak")
-    if "POINTS" in stats_df.columns and "GAMES" in stats_df.columns:
+    if "HOT_STREAK" in stats_df.columns:
+        # Streak già calcolate per tutta la lega (wbb.metrics)
         player_stats = player_stats.sort_values("GAMES")
-        player_stats["HOT_STREAK"] = player_stats["POINTS"].rolling(3).mean() > 20
-        player_stats["COLD_STREAK"] = player_stats["POINTS"].rolling(3).mean() < 5
 
-        fig_streak = px.line(player_stats, x="GAMES", y="POINTS", markers=True,
-                             title=f"Hot & Cold Streak di {selected_player}",
-                             color=player_stats["HOT_STREAK"].map({True: "Hot", False: "Cold"}))
-        st.plotly_chart(fig_streak)
+        fig_streak = cached_figure("streak", (stats_key, selected_player), lambda: figures.streak_line(
+            player_stats, selected_player))
+        plotly_chart(fig_streak)
 
     # ⏳ **Consistenza delle Prestazioni**
     st.header("⏳ Consistenza delle Prestazioni")
     if all(col in stats_df.columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS"]):
-        stats_std = stats_df.groupby("PLAYER_NAME")[["POINTS", "TOTAL_REBOUNDS", "ASSISTS"]].std().reset_index()
+        stats_std = player_summary["std"][["POINTS", "TOTAL_REBOUNDS", "ASSISTS"]].reset_index()
         stats_std = stats_std.melt(id_vars="PLAYER_NAME", var_name="Statistica", value_name="Deviazione Standard")
 
-        fig_consistency = px.box(stats_std, x="Statistica", y="Deviazione Standard",
-                                 title="Consistenza delle Prestazioni")
-        st.plotly_chart(fig_consistency)
+        if aggregate_charts:
+            fig_consistency = cached_figure("consistency", (stats_key, True), lambda: charts.box_figure(
+                stats_std, "Statistica", "Deviazione Standard", "Consistenza delle Prestazioni"))
+        else:
+            fig_consistency = cached_figure("consistency", (stats_key, False), lambda: px.box(
+                stats_std, x="Statistica", y="Deviazione Standard", title="Consistenza delle Prestazioni"))
+        plotly_chart(fig_consistency)
 
-    # 🏀 **Giocatrici con Stile di Gioco Simile**
-    st.header("🏀 Giocatrici con Stile di Gioco Simile")
-    if all(col in stats_df.columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "MINUTES_PLAYED"]):
-        cluster_data = stats_df.groupby("PLAYER_NAME")[["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "MINUTES_PLAYED"]].mean()
-        scaler = StandardScaler()
-        cluster_scaled = scaler.fit_transform(cluster_data)
-        
-        kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-        cluster_data["CLUSTER"] = kmeans.fit_predict(cluster_scaled)
-
-        fig_cluster = px.scatter(cluster_data, x="POINTS", y="ASSISTS", color=cluster_data["CLUSTER"].astype(str),
-                                 hover_name=cluster_data.index, title="Clustering delle Giocatrici")
-        st.plotly_chart(fig_cluster)
-    
-     # 📊 **Efficienza Avanzata**
+    # 📊 **Efficienza Avanzata**
     st.subheader("📈 Efficienza Avanzata")
-    if all(col in stats_df.columns for col in ["POINTS", "FIELD_GOAL_ATTEMPTS", "FREE_THROW_ATTEMPTS", "TURNOVERS", "MINUTES_PLAYED"]):
-        player_stats = stats_df[stats_df["PLAYER_NAME"] == selected_player].copy()
-
-        # Calcolo True Shooting Percentage (TS%)
-        player_stats["TS_PCT"] = player_stats["POINTS"] / (2 * (player_stats["FIELD_GOAL_ATTEMPTS"] + 0.44 * player_stats["FREE_THROW_ATTEMPTS"]))
-        
-        # Calcolo Usage Rate (USG%)
-        player_stats["USG_PCT"] = 100 * (player_stats["FIELD_GOAL_ATTEMPTS"] + 0.44 * player_stats["FREE_THROW_ATTEMPTS"] + player_stats["TURNOVERS"]) / player_stats["MINUTES_PLAYED"]
-        
+    if "TS_PCT" in stats_df.columns:
+        # TS% e USG% sono già colonne del DataFrame: basta la fetta della giocatrice
+        player_stats = player_index.get(selected_player).sort_values("GAMES")
+
         # Visualizzazione grafica
-        fig_efficiency = px.line(player_stats, x="GAMES", y=["TS_PCT", "USG_PCT"], markers=True,
-                                 title=f"Efficienza Avanzata di {selected_player}", labels={"value": "Percentuale", "variable": "Statistica"})
-        st.plotly_chart(fig_efficiency)
+        fig_efficiency = cached_figure("efficiency", (stats_key, selected_player), lambda: figures.efficiency_line(
+            player_stats, selected_player))
+        plotly_chart(fig_efficiency)
 
     # 🔥 **Momentum e Clutch Performance**
     st.subheader("🔥 Momentum e Clutch Performance")
-    if all(col in stats_df.columns for col in ["GAMES", "POINTS", "MINUTES_PLAYED"]):
-        player_stats["MOMENTUM"] = player_stats["POINTS"].rolling(3, min_periods=1).mean()
+    if "MOMENTUM" in stats_df.columns and "MINUTES_PLAYED" in stats_df.columns:
+        player_stats = player_index.get(selected_player).sort_values("GAMES")
 
         # Definiamo clutch performance come partite con punti superiori a 20 e giocate con più di 35 minuti
         clutch_games = player_stats[player_stats["MINUTES_PLAYED"] > 35]
 
-        fig_momentum = px.line(player_stats, x="GAMES", y="MOMENTUM", markers=True,
-                               title=f"Momentum e Clutch Performance di {selected_player}")
-        st.plotly_chart(fig_momentum)
+        fig_momentum = cached_figure("momentum", (stats_key, selected_player), lambda: figures.momentum_line(
+            player_stats, selected_player))
+        plotly_chart(fig_momentum)
 
         if not clutch_games.empty:
             st.write(f"🎯 {selected_player} ha giocato {len(clutch_games)} partite clutch con più di 20 punti e oltre 35 minuti in campo.")
 
     # 🚀 **MVP Index e Valutazione Impatto**
     st.subheader("🚀 MVP Index e Valutazione Impatto")
-    if all(col in stats_df.columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS", "TURNOVERS", "MINUTES_PLAYED"]):
-        stats_df["IMPACT_SCORE"] = (stats_df["POINTS"] + stats_df["TOTAL_REBOUNDS"] + stats_df["ASSISTS"] + stats_df["STEALS"] + stats_df["BLOCKS"]) - stats_df["TURNOVERS"]
-        player_impact = stats_df.groupby("PLAYER_NAME")["IMPACT_SCORE"].mean().reset_index()
-        top_impact = player_impact.sort_values("IMPACT_SCORE", ascending=False).head(10)
-
-        fig_impact = px.bar(top_impact, x="PLAYER_NAME", y="IMPACT_SCORE", title="Top 10 Giocatrici per Impatto", color="IMPACT_SCORE")
-        st.plotly_chart(fig_impact)
+    if "IMPACT_SCORE" in stats_df.columns:
+        top_impact = aggregates.top_players(player_summary, "IMPACT_SCORE")
+
+        fig_impact = cached_figure("impact", stats_key, lambda: figures.impact_bar(top_impact))
+        plotly_chart(fig_impact)
+
+    # 🏆 **Classifiche di Lega**
+    st.subheader("🏆 Classifiche di Lega")
+    if "TS_PCT" in stats_df.columns and "HOT_STREAK_LEN" in stats_df.columns:
+        col_ts, col_streak = st.columns(2)
+        with col_ts:
+            st.write("Migliore TS% (media)")
+            st.dataframe(player_summary["mean"]["TS_PCT"].nlargest(10).rename("TS%"))
+        with col_streak:
+            st.write("Hot streak più lunga (partite)")
+            st.dataframe(player_summary["max"]["HOT_STREAK_LEN"].nlargest(10).rename("Partite"))
+
+
+# 🧩 **Clustering per stile di gioco** (sezione pesante: calcolata solo se aperta)
+def render_clusters():
+    if not stats_file:
+        st.info("Carica il file Excel con le statistiche per questa sezione.")
+        return
+
+    if stream_stats:
+        # Bastano le medie per giocatrice calcolate durante la lettura a blocchi
+        player_summary = streamed_stats(stats_file, optional_teams())["players"]
+        players = player_summary.index.tolist()
+    else:
+        stats_df = load_stats(stats_file)
+        player_summary, _ = stats_summaries(stats_df)
+        players = stats_indexes(stats_df)[0].keys
 
-#st.write("📊 **Analisi individuale delle giocatrici completata!**")
+    # 🏀 **Giocatrici con Stile di Gioco Simile**
+    st.header("🏀 Giocatrici con Stile di Gioco Simile")
+    selected_player = st.selectbox("Seleziona una giocatrice:", players)
 
-if stats_file:
-    stats_df = pd.read_excel(stats_file)
-    stats_df.columns = stats_df.columns.str.strip().str.upper()  # 👈 Convertiamo in MAIUSCOLO
+    if all(col in player_summary["mean"].columns for col in clustering.FEATURES):
+        n_clusters = st.slider("Numero di cluster:", 2, 10, 4)
+        use_minibatch = st.checkbox("Usa MiniBatchKMeans (più veloce con molte giocatrici)")
+        cluster_method = "minibatch" if use_minibatch else "kmeans"
+        warm_start = st.checkbox("Riparti dai cluster precedenti di questa sessione (più veloce, risultato "
+                                 "dipende dal file caricato prima)")
+
+        def show_clusters(clusters, clusters_key):
+            cluster_data = clusters.data
+            render_mode = charts.scatter_render_mode(len(cluster_data), point_budget)
+            fig_cluster = cached_figure("clusters", (clusters_key, render_mode), lambda: px.scatter(
+                cluster_data, x="POINTS", y="ASSISTS", color=cluster_data["CLUSTER"].astype(str),
+                hover_name=cluster_data.index, title="Clustering delle Giocatrici", render_mode=render_mode))
+            plotly_chart(fig_cluster)
+
+            # 👯 Giocatrici più simili a quella selezionata (indice dei vicini già pronto)
+            st.write(f"Giocatrici più simili a {selected_player}:")
+            st.dataframe(clusters.similar(selected_player, n=5))
+
+        player_clusters(player_summary["mean"], n_clusters, cluster_method, show_clusters, warm_start)
+
+
+# 🆚 **Confronto tra due giocatrici**
+def render_comparison():
+    if not stats_file:
+        st.info("Carica il file Excel con le statistiche per questa sezione.")
+        return
+
+    if stream_stats:
+        # Barre e radar usano le medie per giocatrice; l'andamento partita per partita no
+        player_summary = streamed_stats(stats_file, optional_teams())["players"]
+        players, player_index = player_summary.index.tolist(), None
+        stats_key = (ingest.file_digest(stats_file.getvalue()), "stream")
+        columns = player_summary["mean"].columns
+    else:
+        stats_df = load_stats(stats_file)
+        player_summary, team_summary = stats_summaries(stats_df)
+        player_index, _ = stats_indexes(stats_df)
+        players = player_index.keys
+        stats_key = stats_df.attrs["digest"]
+        columns = stats_df.columns
 
     st.header("📊 Analisi delle Statistiche Giocatrici")
 
     # Selezione delle due giocatrici
-    players = stats_df["PLAYER_NAME"].unique()
     selected_player1 = st.selectbox("Seleziona la prima giocatrice:", players, index=0)
     selected_player2 = st.selectbox("Seleziona la seconda giocatrice:", players, index=1)
 
     # 📊 **Confronto Statistiche Base**
     st.subheader("📊 Confronto tra Giocatrici")
 
-    if all(col in stats_df.columns for col in ["PLAYER_NAME", "POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS"]):
-        player1_stats = stats_df[stats_df["PLAYER_NAME"] == selected_player1].mean(numeric_only=True)
-        player2_stats = stats_df[stats_df["PLAYER_NAME"] == selected_player2].mean(numeric_only=True)
+    if all(col in columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS"]):
+        compare_df = aggregates.compare_players(player_summary, selected_player1, selected_player2)
 
-        compare_df = pd.DataFrame({
-            "Statistiche": ["Punti", "Rimbalzi", "Assist", "Rubate", "Blocchi"],
-            selected_player1: [player1_stats["POINTS"], player1_stats["TOTAL_REBOUNDS"], player1_stats["ASSISTS"], player1_stats["STEALS"], player1_stats["BLOCKS"]],
-            selected_player2: [player2_stats["POINTS"], player2_stats["TOTAL_REBOUNDS"], player2_stats["ASSISTS"], player2_stats["STEALS"], player2_stats["BLOCKS"]],
-        })
-
-        fig_compare = px.bar(compare_df, x="Statistiche", y=[selected_player1, selected_player2],
-                             title=f"Confronto {selected_player1} vs {selected_player2}",
-                             barmode="group")
-        st.plotly_chart(fig_compare)
+        fig_compare = cached_figure("compare", (stats_key, selected_player1, selected_player2), lambda: figures.compare_bar(
+            compare_df, selected_player1, selected_player2))
+        plotly_chart(fig_compare)
 
     # 📈 **Andamento delle Prestazioni nel Tempo**
     st.subheader("📈 Andamento delle Prestazioni")
-    if all(col in stats_df.columns for col in ["GAMES", "POINTS", "TOTAL_REBOUNDS", "ASSISTS"]):
-        fig_trend = px.line(stats_df[stats_df["PLAYER_NAME"].isin([selected_player1, selected_player2])],
-                            x="GAMES", y="POINTS", color="PLAYER_NAME",
-                            title=f"Andamento dei Punti nel Tempo: {selected_player1} vs {selected_player2}",
-                            markers=True)
-        st.plotly_chart(fig_trend)
+    if player_index is None:
+        needs_full_stats()
+    elif all(col in columns for col in ["GAMES", "POINTS", "TOTAL_REBOUNDS", "ASSISTS"]):
+        fig_trend = cached_figure("trend", (stats_key, selected_player1, selected_player2), lambda: figures.trend_line(
+            player_index.get_many([selected_player1, selected_player2]), selected_player1, selected_player2))
+        plotly_chart(fig_trend)
 
     # 🔄 **Radar Chart per confronto multi-statistica**
     st.subheader("🔄 Confronto Multi-Statistica")
-    if all(col in stats_df.columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS"]):
-        radar_df = pd.DataFrame({
-            "Statistiche": ["Punti", "Rimbalzi", "Assist", "Rubate", "Blocchi"],
-            selected_player1: [player1_stats["POINTS"], player1_stats["TOTAL_REBOUNDS"], player1_stats["ASSISTS"], player1_stats["STEALS"], player1_stats["BLOCKS"]],
-            selected_player2: [player2_stats["POINTS"], player2_stats["TOTAL_REBOUNDS"], player2_stats["ASSISTS"], player2_stats["STEALS"], player2_stats["BLOCKS"]],
-        })
+    if all(col in columns for col in ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS"]):
+        radar_df = aggregates.compare_players(player_summary, selected_player1, selected_player2)
 
-        fig_radar = px.line_polar(radar_df.melt(id_vars="Statistiche"), r="value", theta="Statistiche", 
-                                  color="variable", line_close=True,
-                                  title=f"Radar Chart: {selected_player1} vs {selected_player2}")
-        st.plotly_chart(fig_radar)
+        fig_radar = cached_figure("compare_radar", (stats_key, selected_player1, selected_player2), lambda: figures.compare_radar(
+            radar_df, selected_player1, selected_player2))
+        plotly_chart(fig_radar)
 
 
-stats_df = pd.read_excel(stats_file)
+# 🏀 **Statistiche per squadra**
+def render_team_stats():
+    if not stats_file:
+        st.info("Carica il file Excel con le statistiche per questa sezione.")
+        return
 
-# Normalizziamo i nomi delle squadre per evitare errori di formattazione
-stats_df["TEAM_NAME"] = stats_df["TEAM_NAME"].str.strip().str.upper()
+    if stream_stats:
+        needs_full_stats()
+        return
 
-# Lista delle squadre disponibili
-team_list = sorted(stats_df["TEAM_NAME"].unique())
+    stats_df = load_stats(stats_file)
 
-# Interfaccia Streamlit
-st.title("📊 Analisi Statistiche - per Squadra")
+    # Indice per squadra con i nomi già normalizzati (spazi e maiuscole)
+    _, team_index = stats_indexes(stats_df)
+    stats_key = stats_df.attrs["digest"]
 
-# Selezione della squadra
-selected_team = st.selectbox("🏀 Seleziona una squadra:", team_list)
+    # Lista delle squadre disponibili
+    team_list = team_index.sorted_keys
 
-# Filtriamo i dati della squadra selezionata
-team_data = stats_df[stats_df["TEAM_NAME"] == selected_team]
+    # Interfaccia Streamlit
+    st.title("📊 Analisi Statistiche - per Squadra")
 
-if team_data.empty:
-    st.warning("⚠️ Nessun dato disponibile per questa squadra.")
-else:
-    st.subheader(f"📌 Statistiche per {selected_team}")
-
-    # Mostriamo la tabella dei dati
-    st.dataframe(team_data)
-
-    # Selezione della metrica da visualizzare
-    stat_columns = [col for col in stats_df.columns if col not in ["TEAM_NAME", "PLAYER_NAME"]]
-    selected_stat = st.selectbox("📈 Seleziona una statistica:", stat_columns)
-
-    # 📊 Grafico a barre per la statistica selezionata
-    fig_bar = px.bar(
-        team_data,
-        x="PLAYER_NAME",
-        y=selected_stat,
-        title=f"{selected_stat} per giocatrice",
-        color="PLAYER_NAME"
-    )
-    st.plotly_chart(fig_bar)
-
-    # 📊 Distribuzione della statistica scelta
-    fig_hist = px.histogram(
-        team_data,
-        x=selected_stat,
-        nbins=10,
-        title=f"Distribuzione di {selected_stat}",
-        color_discrete_sequence=["#1f77b4"]
-    )
-    st.plotly_chart(fig_hist)
-
-    # 📌 Comparazione tra due statistiche
-    selected_stat_2 = st.selectbox("📊 Seleziona una seconda statistica:", stat_columns)
-    fig_scatter = px.scatter(
-        team_data,
-        x=selected_stat,
-        y=selected_stat_2,
-        text="PLAYER_NAME",
-        title=f"Confronto {selected_stat} vs {selected_stat_2}",
-        color="PLAYER_NAME",
-        size_max=15
-    )
-    fig_scatter.update_traces(textposition="top center")
-    st.plotly_chart(fig_scatter)
-
-    # 📌 Radar Chart per confronto multiplo
-    num_players = len(team_data)
-    if num_players > 1:
-        selected_players = st.multiselect("👤 Seleziona giocatrici per radar chart:", team_data["PLAYER_NAME"].unique())
-
-        if selected_players:
-            radar_data = team_data[team_data["PLAYER_NAME"].isin(selected_players)]
-            fig_radar = go.Figure()
-            for _, row in radar_data.iterrows():
-                fig_radar.add_trace(go.Scatterpolar(
-                    r=row[stat_columns].values,
-                    theta=stat_columns,
-                    fill="toself",
-                    name=row["PLAYER_NAME"]
-                ))
-            fig_radar.update_layout(title="📡 Radar Chart Statistiche")
-            st.plotly_chart(fig_radar)
-
-# Verifica che siano stati caricati i file
-if not roster_files or not stats_file or not teams_file:
-    st.warning("⚠️ Carica tutti i file necessari per procedere.")
-else:
-    # 📂 Carica i file CSV e Excel
-    # Carica i file roster per ogni anno (2021-2025)
-    rosters_df = pd.concat([pd.read_csv(file) for file in roster_files], ignore_index=True)
+    # Selezione della squadra
+    selected_team = st.selectbox("🏀 Seleziona una squadra:", team_list)
+
+    # Filtriamo i dati della squadra selezionata
+    team_data = team_index.get(selected_team)
+
+    if team_data.empty:
+        st.warning("⚠️ Nessun dato disponibile per questa squadra.")
+    else:
+        st.subheader(f"📌 Statistiche per {selected_team}")
 
-    # Carica il file delle statistiche
-    stats_df = pd.read_excel(stats_file)
+        # Mostriamo la tabella dei dati
+        st.dataframe(team_data)
+
+        # Selezione della metrica da visualizzare
+        stat_columns = [col for col in stats_df.columns if col not in ["TEAM_NAME", "PLAYER_NAME"]]
+        selected_stat = st.selectbox("📈 Seleziona una statistica:", stat_columns)
 
-    # Carica il file delle squadre (non utilizzato direttamente per ora, ma può servire)
-    teams_df = pd.read_csv(teams_file)
+        # 📊 Grafico a barre per la statistica selezionata
+        fig_bar = cached_figure("team_bar", (stats_key, selected_team, selected_stat), lambda: figures.stat_bar(
+            team_data, selected_stat, "PLAYER_NAME"))
+        plotly_chart(fig_bar)
+
+        # 📊 Distribuzione della statistica scelta
+        fig_hist = cached_figure("team_hist", (stats_key, selected_team, selected_stat), lambda: figures.stat_histogram(team_data, selected_stat))
+        plotly_chart(fig_hist)
 
-    # Normalizziamo i nomi delle squadre per evitare errori di formattazione
-    rosters_df["team"] = rosters_df["team"].str.strip().str.upper()
+        # 📌 Comparazione tra due statistiche
+        selected_stat_2 = st.selectbox("📊 Seleziona una seconda statistica:", stat_columns)
+        fig_scatter = cached_figure("team_scatter", (stats_key, selected_team, selected_stat, selected_stat_2), lambda: figures.stat_scatter(
+            team_data, selected_stat, selected_stat_2, "PLAYER_NAME"))
+        plotly_chart(fig_scatter)
+
+        # 📌 Radar Chart per confronto multiplo
+        num_players = len(team_data)
+        if num_players > 1:
+            selected_players = st.multiselect("👤 Seleziona giocatrici per radar chart:", team_data["PLAYER_NAME"].unique())
+
+            if selected_players:
+                radar_data = team_data[team_data["PLAYER_NAME"].isin(selected_players)]
+                fig_radar = cached_figure("team_radar", (stats_key, selected_team, tuple(selected_players)), lambda: figures.radar(
+                    radar_data, stat_columns, "PLAYER_NAME"))
+                plotly_chart(fig_radar)
+
+
+# 📋 **Roster per squadra**
+def render_roster_teams():
+    if not roster_files or not stats_file or not teams_file:
+        st.warning("⚠️ Carica tutti i file necessari per procedere.")
+        return
+
+    if stream_rosters:
+        # La lettura a blocchi non conserva le singole giocatrici: niente tabella per squadra
+        st.info("Il roster per squadra mostra le singole giocatrici: disattiva la lettura a blocchi "
+                "dei roster per vederlo. I conteggi per squadra sono nella sezione dei roster nel tempo.")
+        return
+
+    # 📂 Carica i file CSV
+    # Carica i file roster per ogni anno (2021-2025)
+    store = roster_store(roster_files)
+    rosters_df = store.frame()
+    roster_key = store.fingerprint
+
+    # Carica il file delle squadre (conference e division, join su ncaa_id)
+    teams_df = load_teams(teams_file)
+
+    # Normalizziamo i nomi delle squadre per evitare errori di formattazione (indice costruito una volta)
+    roster_team_index = store.index("team", normalize=True)
 
     # Lista delle squadre disponibili
-    team_list = sorted(rosters_df["team"].unique())
+    team_list = roster_team_index.sorted_keys
 
     # Interfaccia Streamlit
     st.title("📊 Analisi Statistiche - per Squadra")
@@ -334,12 +755,15 @@ else:
     selected_team = st.selectbox("🏀 Seleziona una squadra:", team_list)
 
     # Filtriamo i dati della squadra selezionata
-    team_data = rosters_df[rosters_df["team"] == selected_team]
+    team_data = roster_team_index.get(selected_team)
 
     if team_data.empty:
         st.warning("⚠️ Nessun dato disponibile per questa squadra.")
     else:
         st.subheader(f"📌 Statistiche per {selected_team}")
+        team_info = teams_df[teams_df["ncaa_id"].isin(team_data["ncaa_id"].dropna())]
+        if not team_info.empty:
+            st.caption(f"Conference: {team_info['conference'].iloc[0]} · Division: {team_info['division'].iloc[0]}")
 
         # Mostriamo la tabella dei dati
         st.dataframe(team_data)
@@ -350,49 +774,24 @@ else:
 
         # 📊 Grafico a barre per la statistica selezionata
         if selected_stat in ["height_clean", "year"]:  # Per colonna numerica
-            fig_bar = px.bar(
-                team_data,
-                x="name",
-                y=selected_stat,
-                title=f"{selected_stat} per giocatrice",
-                color="name"
-            )
-            st.plotly_chart(fig_bar)
+            fig_bar = cached_figure("roster_bar", (roster_key, selected_team, selected_stat), lambda: figures.stat_bar(
+                team_data, selected_stat, "name"))
+            plotly_chart(fig_bar)
 
         elif selected_stat == "position":  # Per colonna categorica (posizione)
-            fig_bar = px.bar(
-                team_data,
-                x="position",
-                title=f"Distribuzione per posizione",
-                color="position",
-                category_orders={"position": sorted(team_data["position"].unique())}
-            )
-            st.plotly_chart(fig_bar)
+            fig_bar = cached_figure("roster_bar", (roster_key, selected_team, selected_stat), lambda: figures.position_bar(team_data))
+            plotly_chart(fig_bar)
 
         # 📊 Distribuzione della statistica scelta (per colonne numeriche come height, year)
         if selected_stat in ["height_clean", "year"]:
-            fig_hist = px.histogram(
-                team_data,
-                x=selected_stat,
-                nbins=10,
-                title=f"Distribuzione di {selected_stat}",
-                color_discrete_sequence=["#1f77b4"]
-            )
-            st.plotly_chart(fig_hist)
+            fig_hist = cached_figure("roster_hist", (roster_key, selected_team, selected_stat), lambda: figures.stat_histogram(team_data, selected_stat))
+            plotly_chart(fig_hist)
 
         # 📌 Comparazione tra due statistiche (altezza vs posizione, ad esempio)
         selected_stat_2 = st.selectbox("📊 Seleziona una seconda statistica:", stat_columns)
-        fig_scatter = px.scatter(
-            team_data,
-            x=selected_stat,
-            y=selected_stat_2,
-            text="name",
-            title=f"Confronto {selected_stat} vs {selected_stat_2}",
-            color="name",
-            size_max=15
-        )
-        fig_scatter.update_traces(textposition="top center")
-        st.plotly_chart(fig_scatter)
+        fig_scatter = cached_figure("roster_scatter", (roster_key, selected_team, selected_stat, selected_stat_2), lambda: figures.stat_scatter(
+            team_data, selected_stat, selected_stat_2, "name"))
+        plotly_chart(fig_scatter)
 
         # 📌 Radar Chart per confronto multiplo (puoi scegliere statistiche numeriche da confrontare)
         num_players = len(team_data)
@@ -400,53 +799,150 @@ else:
             selected_players = st.multiselect("👤 Seleziona giocatrici per radar chart:", team_data["name"].unique())
 
             if selected_players:
+                # Adatta le colonne numeriche che vuoi nel radar chart
                 radar_data = team_data[team_data["name"].isin(selected_players)]
-                fig_radar = go.Figure()
-                for _, row in radar_data.iterrows():
-                    fig_radar.add_trace(go.Scatterpolar(
-                        r=row[stat_columns].values,  # Adatta le colonne numeriche che vuoi nel radar chart
-                        theta=stat_columns,
-                        fill="toself",
-                        name=row["name"]
-                    ))
-                fig_radar.update_layout(title="📡 Radar Chart Statistiche")
-                st.plotly_chart(fig_radar)
-                
-# 📌 **Punto 4: Analisi avanzate con grafici 3D**
-if stats_file:
-    stats_df = pd.read_excel(stats_file)
-    stats_df.columns = stats_df.columns.str.strip().str.lower()
+                fig_radar = cached_figure("roster_radar", (roster_key, selected_team, tuple(selected_players)), lambda: figures.radar(
+                    radar_data, stat_columns, "name"))
+                plotly_chart(fig_radar)
+
+
+# 🏆 **Conference e Division**: classifiche lette dai riepiloghi già calcolati
+def render_conferences():
+    if not stats_file or not teams_file:
+        st.info("Carica il file Excel con le statistiche e il CSV delle squadre per questa sezione.")
+        return
+
+    teams_df = load_teams(teams_file)
+    if stream_stats:
+        result = streamed_stats(stats_file, teams_df)
+        rollup, matched = result["rollup"], result["coverage"]
+        rollup_key = (ingest.file_digest(stats_file.getvalue()), teams_df.attrs["digest"], "stream")
+    else:
+        stats_df = load_stats(stats_file)
+        rollup, matched = stats_rollup(stats_df, teams_df)
+        rollup_key = (stats_df.attrs["digest"], teams_df.attrs["digest"])
+
+    st.header("🏆 Conference e Division")
+    # Copertura del collegamento con teams.csv: le squadre non trovate finiscono in "N/D"
+    st.caption(f"Righe collegate a teams.csv: {matched['matched']} di {matched['rows']} "
+               f"({matched['matched'] / max(matched['rows'], 1):.0%}). Le altre sono nel gruppo "
+               f"\"{rollups.UNKNOWN}\", escluso dalle classifiche.")
+    if matched["unmatched_teams"]:
+        with st.expander(f"Squadre senza corrispondenza ({len(matched['unmatched_teams'])})"):
+            st.write(", ".join(matched["unmatched_teams"]))
+    levels = {"Division": "DIVISION", "Conference": "CONFERENCE", "Squadra": "TEAM_NAME", "Giocatrice": "PLAYER_NAME"}
+    level = levels[st.radio("Livello:", list(levels), index=1, horizontal=True)]
+    depth = rollup.levels.index(level)
+
+    # Filtri sui livelli superiori (division, poi conference)
+    keys = []
+    if depth >= 1:
+        divisions = ["Tutte"] + rollup.means("DIVISION").index.tolist()
+        division = st.selectbox("Division:", divisions)
+        if division != "Tutte":
+            keys.append(division)
+    if depth >= 2 and keys:
+        conferences = ["Tutte"] + rollup.get("CONFERENCE", *keys).index.get_level_values("CONFERENCE").tolist()
+        conference = st.selectbox("Conference:", conferences)
+        if conference != "Tutte":
+            keys.append(conference)
+
+    stat = st.selectbox("📈 Statistica:", rollup.columns, index=rollup.columns.index("POINTS") if "POINTS" in rollup.columns else 0)
+    top_n = st.slider("Prime posizioni:", 5, 50, 15)
+    leaders = rollup.leaders(level, stat, *keys, n=top_n)
+
+    fig_rollup = cached_figure("rollup", (rollup_key, level, tuple(keys), stat, top_n), lambda: figures.rollup_bar(
+        leaders, level, stat))
+    plotly_chart(fig_rollup)
+    st.dataframe(leaders[[stat, "RIGHE"]].reset_index(), hide_index=True)
+
+    # 📋 Giocatrici e altezza media per conference, dal roster (se caricato)
+    if roster_files:
+        if stream_rosters:
+            roster_summary = streamed_rosters(roster_files, teams_df)[0].rollup
+        else:
+            roster_summary = roster_rollup(roster_store(roster_files), teams_df)
+        st.subheader("📋 Roster per conference")
+        st.dataframe(roster_summary.get("conference", *keys[:1]).reset_index(), hide_index=True)
+
+
+# 📌 **Punto 4: Analisi avanzate con grafici 3D** (sezione pesante: calcolata solo se aperta)
+def render_3d():
+    if not stats_file:
+        st.info("Carica il file Excel con le statistiche per questa sezione.")
+        return
+
+    if stream_stats:
+        needs_full_stats()
+        return
+
+    stats_df = ingest.lower_view(load_stats(stats_file))  # Vista con le colonne in minuscolo
+    stats_key = stats_df.attrs["digest"]
+    budget_3d = point_budget if aggregate_charts else len(stats_df)
 
     st.header("📊 Analisi Avanzate con Grafici 3D")
 
     # 🏟️ **Heatmap 3D delle zone di tiro**
     if "shot_x" in stats_df.columns and "shot_y" in stats_df.columns and "fg_pct" in stats_df.columns:
-        fig_shot_3d = go.Figure(data=[go.Scatter3d(
-            x=stats_df["shot_x"],
-            y=stats_df["shot_y"],
-            z=stats_df["fg_pct"],
-            mode="markers",
-            marker=dict(size=5, color=stats_df["fg_pct"], colorscale="Viridis", opacity=0.8)
-        )])
-        fig_shot_3d.update_layout(title="Heatmap 3D delle Zone di Tiro", scene=dict(
+        deferred("shot_3d", (stats_key, budget_3d), lambda: charts.scatter3d_figure(
+            stats_df, "shot_x", "shot_y", "fg_pct", color="fg_pct", colorscale="Viridis", size=5, budget=budget_3d
+        ).update_layout(title="Heatmap 3D delle Zone di Tiro", scene=dict(
             xaxis_title="Posizione X", yaxis_title="Posizione Y", zaxis_title="Percentuale FG"
-        ))
-        st.plotly_chart(fig_shot_3d)
+        )), plotly_chart)
 
     # 🎭 **Grafico 3D con prestazioni su più metriche**
     if all(col in stats_df.columns for col in ["points", "assists", "rebounds"]):
-        fig_perf_3d = go.Figure(data=[go.Scatter3d(
-            x=stats_df["points"],
-            y=stats_df["assists"],
-            z=stats_df["rebounds"],
-            mode="markers",
-            marker=dict(size=6, color=stats_df["points"], colorscale="Plasma", opacity=0.8)
-        )])
-        fig_perf_3d.update_layout(title="Prestazioni 3D (Punti, Assist, Rimbalzi)", scene=dict(
+        deferred("perf_3d", (stats_key, budget_3d), lambda: charts.scatter3d_figure(
+            stats_df, "points", "assists", "rebounds", color="points", colorscale="Plasma", size=6, budget=budget_3d
+        ).update_layout(title="Prestazioni 3D (Punti, Assist, Rimbalzi)", scene=dict(
             xaxis_title="Punti", yaxis_title="Assist", zaxis_title="Rimbalzi"
-        ))
-        st.plotly_chart(fig_perf_3d)
+        )), plotly_chart)
+
+
+# 🧭 **Navigazione**: a ogni rerun si esegue solo la sezione aperta
+SECTIONS = {
+    "🗂️ Roster nel tempo": render_rosters,
+    "🗺️ Mappa geografica": render_geo,
+    "👤 Analisi individuale": render_player,
+    "🧩 Stile di gioco": render_clusters,
+    "🆚 Confronto tra giocatrici": render_comparison,
+    "🏀 Statistiche per squadra": render_team_stats,
+    "📋 Roster per squadra": render_roster_teams,
+    "🏆 Conference e Division": render_conferences,
+    "🧊 Analisi 3D": render_3d,
+}
+section = st.sidebar.radio("📑 Sezione", list(SECTIONS))
+
+# 🐞 **Profilazione (opzionale)**: con WBB_PROFILE=1 o ?debug=1 nell'URL ogni rerun viene
+# misurato e mostrato nel pannello di debug. Solo WBB_PROFILE=1 (scelta di chi avvia il
+# server, non di chi visita l'app) scrive su disco il log JSON lines e i dump cProfile.
+export_profiles = os.environ.get("WBB_PROFILE") == "1"
+debug = export_profiles or st.query_params.get("debug") == "1"
+save_cprofile = export_profiles and st.sidebar.checkbox("Salva profilo cProfile del rerun")
+
+if debug:
+    session_id = st.session_state.setdefault("profile_session", os.urandom(4).hex())
+    rerun = profiling.profiling(section, profiling.cprofile_path("rerun") if save_cprofile else None)
+else:
+    rerun = nullcontext()
+
+with rerun as profile:
+    with profiling.timed(section, kind="section"):
+        SECTIONS[section]()
+        show_deferred()
 
-   
 # Footer
 st.write("App creata da Giulia (e Chat) usando Streamlit e Plotly")
+
+# 🐞 **Pannello di debug**: tempi del rerun appena eseguito e stato delle cache
+if debug:
+    timings = profile.to_frame()
+    with st.expander(f"🐞 Debug prestazioni: {profile.seconds:.3f} s"):
+        st.dataframe(timings, hide_index=True)
+        cached = timings["cache"].value_counts()
+        st.write(f"Cache: {cached.get('hit', 0)} hit, {cached.get('miss', 0)} miss")
+        if export_profiles:
+            try:
+                st.caption(f"Log: {profiling.write_jsonl(profile, session=session_id)}")
+            except OSError as exc:
+                st.caption(f"Log non scritto: {exc}")
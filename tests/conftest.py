@@ -0,0 +1,46 @@
+"""Dati di prova: il roster fornito in ``data/`` e due stagioni successive derivate da lui."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from wbb import bench, ingest
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+SEASONS = ["2021-22", "2022-23", "2023-24"]
+
+
+@pytest.fixture(scope="session")
+def raw_seasons():
+    """CSV grezzi di tre stagioni: quella fornita e due con il 30% di giocatrici nuove ogni anno."""
+    first = pd.read_csv(DATA_DIR / "wbb_rosters_2021_22.csv").assign(season=SEASONS[0])
+    second = bench.next_season(first, SEASONS[1], seed=1)
+    third = bench.next_season(second, SEASONS[2], seed=2)
+    return {season: df for season, df in zip(SEASONS, [first, second, third])}
+
+
+@pytest.fixture(scope="session")
+def season_files(raw_seasons):
+    """Byte CSV per stagione, come li riceverebbe l'app."""
+    return {season: df.to_csv(index=False).encode() for season, df in raw_seasons.items()}
+
+
+@pytest.fixture(scope="session")
+def season_rosters(season_files):
+    """Roster letti con :func:`wbb.ingest.read_roster`, per stagione."""
+    return {season: ingest.read_roster(data) for season, data in season_files.items()}
+
+
+@pytest.fixture(scope="session")
+def teams_df():
+    return ingest.read_teams((DATA_DIR / "teams.csv").read_bytes())
+
+
+@pytest.fixture(scope="session")
+def stats_path():
+    return DATA_DIR / "player_stats.xlsx"
+
+
+@pytest.fixture(scope="session")
+def stats_df(stats_path):
+    return ingest.read_stats(stats_path.read_bytes())
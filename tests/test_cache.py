@@ -0,0 +1,42 @@
+"""Cache su disco: niente file di schemi vecchi, dimensione limitata ai file usati di recente."""
+import os
+
+import pytest
+
+from wbb import cache, schema
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def fake_entry(folder, name, size, mtime):
+    path = folder / name
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_old_schema_files_are_removed(cache_dir, teams_df):
+    old = fake_entry(cache_dir, f"teams-v{schema.SCHEMA_VERSION - 1}-abc123.feather", 10, 1)
+    other = fake_entry(cache_dir, "2021-22--abc123.feather", 10, 1)  # non è un file di load()
+
+    cache.load("teams", teams_df.to_csv(index=False).encode())
+    assert not old.exists() and other.exists()
+    assert len(list(cache_dir.glob(f"teams-v{schema.SCHEMA_VERSION}-*.feather"))) == 1
+
+
+def test_prune_keeps_recently_used_files(cache_dir):
+    version = schema.SCHEMA_VERSION
+    oldest = fake_entry(cache_dir, f"stats-v{version}-aa.feather", 100, 1)
+    recent = fake_entry(cache_dir, f"stats-v{version}-bb.feather", 100, 3)
+    kept = fake_entry(cache_dir, f"roster-v{version}-cc.feather", 100, 2)
+
+    assert cache.prune(max_bytes=250) == [oldest]
+    assert recent.exists() and kept.exists()
+
+    # Il file appena scritto resta anche se da solo supera il limite
+    assert set(cache.prune(max_bytes=0, keep=recent)) == {kept}
+    assert recent.exists()
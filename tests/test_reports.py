@@ -0,0 +1,25 @@
+"""Report statici: ogni squadra delle statistiche ha una pagina, con o senza riga in teams.csv."""
+import pandas as pd
+
+from wbb import reports
+
+
+def test_every_stats_team_is_reported(stats_df, teams_df):
+    league = reports.League(stats_df, None, teams_df)
+    matched = {league.team_key(team.get("stats_name"), team["team"]) for _, team in teams_df.iterrows()}
+    unmatched = league.unmatched_teams()
+    assert unmatched and not {reports._key(name) for name in unmatched} & matched
+
+    # Squadre collegate e squadre solo nelle statistiche coprono tutte le giocatrici
+    keys = (matched - {None}) | {reports._key(name) for name in unmatched}
+    assert sum(len(league.team_index.get(key)) for key in keys) == len(stats_df)
+
+
+def test_unmatched_team_report(stats_df, teams_df, tmp_path):
+    league = reports.League(stats_df, None, teams_df)
+    name = league.unmatched_teams()[0]
+    result = reports.team_report(league, pd.Series({"team": name, "stats_name": name}), tmp_path,
+                                 folder="altra")
+    assert result["folder"] == "altra"
+    players = stats_df.loc[stats_df["TEAM_NAME"].astype(object).eq(name), "PLAYER_NAME"].nunique()
+    assert result["giocatrici"] == players > 0
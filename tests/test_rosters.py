@@ -0,0 +1,121 @@
+"""RosterStore incrementale: stesso risultato di un ricalcolo completo, in qualunque ordine."""
+import itertools
+
+import pandas as pd
+import pytest
+
+from wbb import rosters
+
+
+def build(season_rosters, seasons):
+    store = rosters.RosterStore()
+    for season in seasons:
+        store.add(season_rosters[season], season, season=season)
+    return store
+
+
+def snapshot(store):
+    """Contenuto confrontabile dello store: righe con flag, conteggi e movimenti, in ordine fisso."""
+    frame = store.frame()[["season", "team", "player_id", "new_player"]].astype({"team": object})
+    counts = store.team_counts().astype({"team": object})
+    moves = store.moves().astype({"from_school": object, "to_school": object, "status": object})
+    team_moves = store.team_moves().astype({"team": object})
+    return [
+        frame.sort_values(["season", "team", "player_id"]).reset_index(drop=True),
+        counts.sort_values(["season", "team"]).reset_index(drop=True),
+        moves.sort_values(["season", "player_id", "status"]).reset_index(drop=True),
+        team_moves.sort_values(["season", "team"]).reset_index(drop=True),
+    ]
+
+
+def assert_same(store, expected):
+    for got, want in zip(snapshot(store), snapshot(expected)):
+        pd.testing.assert_frame_equal(got, want, check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(3))))
+def test_add_order_does_not_matter(season_rosters, order):
+    seasons = sorted(season_rosters)
+    store = build(season_rosters, [seasons[i] for i in order])
+    assert_same(store, build(season_rosters, seasons))
+
+
+def test_new_players_against_previous_seasons(season_rosters):
+    store = build(season_rosters, sorted(season_rosters))
+    first, *later = store.seasons
+    # Nella prima stagione ogni id noto è nuovo (una volta); dopo, solo quelli mai visti
+    assert store.partition(first)["new_player"].sum() == season_rosters[first]["player_id"].nunique()
+    seen = set(season_rosters[first]["player_id"].dropna())
+    for season in later:
+        ids = set(season_rosters[season]["player_id"].dropna())
+        assert store.partition(season)["new_player"].sum() == len(ids - seen)
+        seen |= ids
+
+
+@pytest.mark.parametrize("removed", [0, 1, 2])
+def test_remove_matches_fresh_store(season_rosters, removed):
+    seasons = sorted(season_rosters)
+    store = build(season_rosters, seasons)
+    store.remove(seasons[removed], seasons[removed])
+    assert_same(store, build(season_rosters, [s for s in seasons if s != seasons[removed]]))
+
+
+def test_copy_is_independent(season_rosters):
+    seasons = sorted(season_rosters)
+    store = build(season_rosters, seasons[:2])
+    before = snapshot(store)
+    other = store.copy()
+    other.add(season_rosters[seasons[2]], seasons[2], season=seasons[2])
+    other.remove(seasons[0], seasons[0])
+    for got, want in zip(snapshot(store), before):
+        pd.testing.assert_frame_equal(got, want)
+
+
+def test_fingerprint_depends_on_files_and_seasons(season_rosters):
+    seasons = sorted(season_rosters)
+    roster = season_rosters[seasons[0]]
+    forward = build(season_rosters, seasons)
+    backward = build(season_rosters, seasons[::-1])
+    assert forward.fingerprint == backward.fingerprint
+
+    # Stesso file, stagione diversa: lo store cambia e deve cambiare anche l'impronta
+    relabelled = rosters.RosterStore()
+    relabelled.add(roster, seasons[0], season="2030-31")
+    original = rosters.RosterStore()
+    original.add(roster, seasons[0], season=seasons[0])
+    assert relabelled.fingerprint != original.fingerprint
+
+
+def test_same_file_under_another_season(season_rosters):
+    # Come nell'app: lo store successivo parte da una copia e tiene solo i file ancora caricati
+    roster = season_rosters["2021-22"]
+    store = rosters.RosterStore()
+    store.add(roster, "same", season="2021-22")
+
+    relabelled = store.copy()
+    relabelled.retain([("same", "2023-24")])
+    relabelled.add(roster, "same", season="2023-24")
+    assert relabelled.seasons == ["2023-24"]
+    assert relabelled.files == {("same", "2023-24")}
+    assert relabelled.fingerprint != store.fingerprint
+    assert store.seasons == ["2021-22"]
+
+    # Stessi byte caricati come due stagioni: due file distinti
+    both = rosters.RosterStore()
+    both.add(roster, "same", season="2021-22")
+    both.add(roster, "same", season="2022-23")
+    assert both.seasons == ["2021-22", "2022-23"]
+    both.remove("same", "2021-22")
+    assert both.seasons == ["2022-23"]
+
+
+def test_disk_store_round_trip(season_rosters, tmp_path):
+    seasons = sorted(season_rosters)
+    store = rosters.RosterStore(tmp_path)
+    for season in seasons:
+        store.add(season_rosters[season], season, season=season)
+    store.remove(seasons[1], seasons[1])
+    store.add(season_rosters[seasons[0]], "archive")
+    reloaded = rosters.RosterStore(tmp_path)
+    assert reloaded.files == store.files
+    assert_same(reloaded, store)
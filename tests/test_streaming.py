@@ -0,0 +1,102 @@
+"""Lettura a blocchi: gli aggregati devono coincidere con quelli calcolati sul file intero."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from wbb import aggregates, charts, ingest, rollups, rosters, streaming
+
+# Metriche che dipendono dalle partite precedenti: non calcolate a blocchi
+SEQUENCE_METRICS = {"MOMENTUM", "HOT_STREAK", "COLD_STREAK", "HOT_STREAK_LEN", "COLD_STREAK_LEN"}
+
+
+@pytest.fixture(scope="module")
+def archive(raw_seasons):
+    """Archivio multi-stagione con stagioni mescolate e altezze in pollici (assenti nel file fornito)."""
+    seasons = sorted(raw_seasons)
+    later, first = raw_seasons[seasons[1]], raw_seasons[seasons[0]]
+    df = pd.concat([later.iloc[:1000], first, later.iloc[1000:], raw_seasons[seasons[2]]], ignore_index=True)
+    rng = np.random.default_rng(0)
+    df["total_inches"] = rng.integers(64, 80, len(df)).astype(float)
+    df.loc[::17, "total_inches"] = np.nan
+    return df.to_csv(index=False).encode()
+
+
+@pytest.fixture(scope="module")
+def full_store(archive):
+    store = rosters.RosterStore()
+    store.add(ingest.read_roster(archive), "archive")
+    return store
+
+
+@pytest.fixture(scope="module")
+def streamed(archive, teams_df):
+    return streaming.stream_roster(io.BytesIO(archive), "archive", teams_df=teams_df, chunksize=700)
+
+
+def test_team_counts_match_store(streamed, full_store):
+    got = streamed.team_counts().sort_values(["season", "team"]).reset_index(drop=True)
+    want = full_store.team_counts().astype({"team": object}).sort_values(["season", "team"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, want, check_dtype=False)
+
+
+def test_state_counts_and_heights_match(streamed, full_store):
+    frame = full_store.frame()
+    got, want = streamed.state_counts(), charts.state_counts(frame)
+    assert dict(zip(got["state_clean"], got["giocatrici"])) == dict(zip(want["state_clean"].astype(object), want["giocatrici"]))
+
+    heights = charts.box_stats(frame, "season", "total_inches")
+    pd.testing.assert_frame_equal(streamed.height_box().loc[heights.index], heights, check_dtype=False, check_names=False)
+
+
+def test_roster_rollup_matches(streamed, full_store, teams_df):
+    want = rollups.roster_rollup(rollups.join_roster(full_store.frame(), teams_df))
+    for level in rollups.ROSTER_LEVELS:
+        got, expected = streamed.rollup.means(level), want.means(level)
+        assert got.index.equals(expected.index)
+        np.testing.assert_allclose(got.to_numpy(float), expected.to_numpy(float), rtol=1e-6)
+
+
+def test_disk_store_reloads_all_rows(archive, tmp_path):
+    result = streaming.stream_roster(io.BytesIO(archive), "archive", root=tmp_path, chunksize=700)
+    assert len(rosters.RosterStore(tmp_path).frame()) == result.rows == len(ingest.read_roster(archive))
+
+
+@pytest.mark.parametrize("by", ["PLAYER_NAME", "TEAM_NAME"])
+def test_running_summary_matches_summarize(stats_df, by):
+    summary = streaming.RunningSummary(by)
+    for start in range(0, len(stats_df), 300):
+        summary.add(stats_df.iloc[start:start + 300])
+    got = summary.summary()
+
+    want = aggregates.summarize(stats_df, by)
+    want.index = want.index.astype(object)
+    assert set(got.columns) == set(want.columns)
+    np.testing.assert_allclose(got.loc[want.index, want.columns].to_numpy(float), want.to_numpy(float),
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_stream_stats_from_excel(stats_path, stats_df, tmp_path):
+    result = streaming.stream_stats(stats_path, "stats", root=tmp_path, chunksize=500)
+    assert result["rows"] == len(stats_df)
+    assert len(result["players"]) == stats_df["PLAYER_NAME"].nunique()
+
+    # I blocchi letti con openpyxl hanno gli stessi valori di pd.read_excel
+    stored = streaming.read_stats_store(tmp_path, "stats")
+    columns = [col for col in stats_df.columns if col not in SEQUENCE_METRICS]
+    pd.testing.assert_frame_equal(stored[columns], stats_df[columns], check_dtype=False, check_categorical=False)
+
+
+def test_stream_stats_rollup_matches(stats_path, stats_df, teams_df):
+    result = streaming.stream_stats(stats_path, "stats", chunksize=500, teams_df=teams_df)
+    joined = rollups.join_stats(stats_df, teams_df)
+    assert result["coverage"]["matched"] == rollups.coverage(joined)["matched"]
+    assert set(result["coverage"]["unmatched_teams"]) == set(rollups.coverage(joined)["unmatched_teams"])
+
+    want, got = rollups.stats_rollup(joined), result["rollup"]
+    columns = [col for col in got.columns if col not in SEQUENCE_METRICS]
+    for level in rollups.STATS_LEVELS[:3]:
+        expected = want.means(level)
+        np.testing.assert_allclose(got.means(level).loc[expected.index, columns].to_numpy(float),
+                                   expected[columns].to_numpy(float), rtol=1e-5)
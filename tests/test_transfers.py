@@ -0,0 +1,59 @@
+"""Movimenti tra stagioni e conteggi per squadra."""
+import pandas as pd
+
+from wbb import transfers
+
+
+def roster(rows):
+    df = pd.DataFrame(rows, columns=["player_id", "name", "team", "previous_school_clean"])
+    return df.astype({"player_id": "Int32", "team": "category", "previous_school_clean": "category"})
+
+
+PREVIOUS = roster([
+    (1, "Anna", "X", None),
+    (2, "Bea", "X", None),
+    (3, "Cleo", "Y", None),
+    (4, "Dora", "Y", None),
+])
+CURRENT = roster([
+    (1, "Anna", "X", None),          # confermata
+    (2, "Bea", "Y", None),           # da X a Y
+    (5, "Ella", "X", None),          # nuova, senza scuola precedente
+    (6, "Fede", "Y", "Outside U"),   # trasferita da una scuola fuori dai dati
+    (None, "Gaia", "X", None),       # senza id: arrivo
+])
+
+
+def test_season_moves_statuses():
+    moves = transfers.season_moves(PREVIOUS, CURRENT, "2022-23").set_index("name")
+    assert list(moves.columns) == [c for c in transfers.MOVE_COLUMNS if c != "name"]
+    assert moves["status"].astype(str).to_dict() == {
+        "Anna": "retained", "Bea": "transfer", "Ella": "arriving", "Fede": "transfer",
+        "Gaia": "arriving", "Cleo": "departing", "Dora": "departing",
+    }
+    assert moves.loc["Bea", ["from_school", "to_school"]].tolist() == ["X", "Y"]
+    assert moves.loc["Fede", ["from_school", "in_previous"]].tolist() == ["Outside U", False]
+    assert moves.loc["Cleo", "to_school"] is None
+
+
+def test_team_moves_counts():
+    counts = transfers.team_moves(transfers.season_moves(PREVIOUS, CURRENT, "2022-23"))
+    assert list(counts.columns) == transfers.TEAM_MOVE_COLUMNS
+    counts = counts.set_index("team")
+    columns = transfers.TEAM_MOVE_COLUMNS[2:]
+    assert counts.loc["X", columns].tolist() == [1, 2, 0, 1, 0]
+    assert counts.loc["Y", columns].tolist() == [0, 0, 2, 0, 2]
+    # La scuola esterna non è nei dati: nessuna uscita contata per lei
+    assert "Outside U" not in counts.index
+
+
+def test_team_moves_balance_on_bundled_data(season_rosters):
+    previous, current = (season_rosters[season] for season in sorted(season_rosters)[:2])
+    counts = transfers.team_moves(transfers.season_moves(previous, current, "2022-23"))
+    totals = counts[transfers.TEAM_MOVE_COLUMNS[2:]].sum()
+
+    # Ogni giocatrice della stagione nuova entra una volta (id duplicati contati una volta)
+    incoming = current["player_id"].nunique() + current["player_id"].isna().sum()
+    assert totals["retained"] + totals["arriving"] + totals["transfer_in"] == incoming
+    # Ogni giocatrice della stagione prima resta, cambia squadra o parte
+    assert totals["retained"] + totals["transfer_out"] + totals["departing"] == previous["player_id"].nunique()
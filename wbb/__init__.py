@@ -0,0 +1 @@
+"""Logica di analisi della dashboard sul basket universitario femminile."""
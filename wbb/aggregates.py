@@ -0,0 +1,51 @@
+"""Tabelle riassuntive per giocatrice e per squadra, calcolate una volta sola.
+
+Ogni tabella ha colonne a due livelli ``(aggregazione, statistica)``:
+``summary["mean"]`` restituisce le medie di tutte le statistiche,
+``summary["std"]`` le deviazioni standard, ``summary["max"]`` i massimi e
+``summary["count"]`` il numero di righe. Le metriche derivate (vedi
+:mod:`wbb.metrics`) sono già colonne del DataFrame e vengono riassunte come le
+altre. Tutti i grafici leggono da qui invece di rifare un groupby.
+"""
+import pandas as pd
+
+AGGREGATIONS = ["mean", "std", "max", "count"]
+
+
+def summarize(stats_df: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Media, deviazione standard, massimo e conteggio di ogni statistica numerica per ``by``."""
+    numeric = stats_df.select_dtypes("number")
+    summary = numeric.groupby(stats_df[by], observed=True).agg(AGGREGATIONS)
+    return summary.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+
+# Statistiche dei confronti, con le etichette mostrate nei grafici
+TEAM_COMPARISON = {"POINTS": "Punti", "ASSISTS": "Assist", "TOTAL_REBOUNDS": "Rimbalzi"}
+PLAYER_COMPARISON = {"POINTS": "Punti", "TOTAL_REBOUNDS": "Rimbalzi", "ASSISTS": "Assist",
+                     "STEALS": "Rubate", "BLOCKS": "Blocchi"}
+
+
+def team_vs_player(player_summary: pd.DataFrame, team_summary: pd.DataFrame,
+                   player: str, team: str) -> pd.DataFrame:
+    """Medie di una giocatrice accanto alle medie della sua squadra."""
+    stats = list(TEAM_COMPARISON)
+    return pd.DataFrame({
+        "Statistica": list(TEAM_COMPARISON.values()),
+        "Giocatrice": player_summary["mean"].loc[player, stats].to_numpy(),
+        "Media Squadra": team_summary["mean"].loc[team, stats].to_numpy(),
+    })
+
+
+def compare_players(player_summary: pd.DataFrame, player1: str, player2: str) -> pd.DataFrame:
+    """Medie di due giocatrici, una colonna per giocatrice."""
+    means = player_summary["mean"].loc[[player1, player2], list(PLAYER_COMPARISON)]
+    return pd.DataFrame({
+        "Statistiche": list(PLAYER_COMPARISON.values()),
+        player1: means.iloc[0].to_numpy(),
+        player2: means.iloc[1].to_numpy(),
+    })
+
+
+def top_players(player_summary: pd.DataFrame, stat: str, n: int = 10) -> pd.DataFrame:
+    """Le ``n`` giocatrici con la media più alta di ``stat``."""
+    return player_summary["mean"][stat].nlargest(n).reset_index()
@@ -0,0 +1,273 @@
+"""Benchmark delle fasi di analisi su campionati sintetici di dimensione crescente.
+
+I dati sintetici si ottengono replicando i file in ``data/`` ``scale`` volte
+(squadre, giocatrici e id distinti per ogni copia, statistiche con un po' di
+rumore). Per ogni fase si misurano il tempo (il migliore su ``--repeat``
+esecuzioni) e il picco di memoria Python (``tracemalloc``, in un'esecuzione a
+parte per non falsare i tempi). I risultati vengono salvati in JSON insieme
+al commit, per confrontarli tra versioni::
+
+    python -m wbb.bench data/ --scales 1 10 100 --out benchmarks/
+    python -m wbb.bench data/ --scales 1 10 --compare benchmarks/bench-<commit>-<data>.json
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from wbb import aggregates, cache, charts, clustering, figures, ingest, metrics, rollups, rosters, schema, streaming
+
+DEFAULT_SCALES = [1, 10, 100]
+
+
+# 🧪 **Dati sintetici**
+def _replicate(df: pd.DataFrame, scale: int, labels: dict, ids: list = (), rng=None,
+               noisy: list = ()) -> pd.DataFrame:
+    """``scale`` copie di ``df``: etichette con suffisso, id spostati e colonne ``noisy`` con rumore."""
+    copies = []
+    for i in range(scale):
+        part = df.copy()
+        if i:
+            for col, sep in labels.items():
+                part[col] = part[col].astype(str) + f"{sep}{i}"
+            for col in ids:
+                part[col] = part[col] + i * (int(df[col].max()) + 1)
+        if rng is not None:
+            for col in noisy:
+                part[col] = (part[col] * rng.uniform(0.8, 1.2, len(part))).round()
+        copies.append(part)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_stats(base: pd.DataFrame, scale: int, seed: int = 0) -> pd.DataFrame:
+    """Statistiche grezze (come nel file Excel) per ``scale`` volte le giocatrici di ``base``."""
+    rng = np.random.default_rng(seed)
+    counts = [col for col in base.select_dtypes("number").columns
+              if "PERCENTAGE" not in col.upper() and col.upper() != "GAMES"]
+    return _replicate(base, scale, {"PLAYER_NAME": " #", "TEAM_NAME": " "}, rng=rng, noisy=counts)
+
+
+def synthetic_roster(base: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """Roster grezzo per ``scale`` volte le squadre di ``base``."""
+    return _replicate(base, scale, {"team": " ", "name": " #"}, ids=["player_id", "ncaa_id"])
+
+
+def synthetic_teams(base: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """File delle squadre coerente con :func:`synthetic_roster` e :func:`synthetic_stats`."""
+    return _replicate(base, scale, {"team": " ", "stats_name": " "}, ids=["ncaa_id"])
+
+
+def next_season(roster: pd.DataFrame, season: str, keep: float = 0.7, seed: int = 0) -> pd.DataFrame:
+    """Stagione successiva: resta una quota ``keep`` delle giocatrici, le altre sono nuove."""
+    rng = np.random.default_rng(seed)
+    roster = roster.copy()
+    new = rng.random(len(roster)) >= keep
+    roster.loc[new, "player_id"] = roster["player_id"].max() + 1 + np.arange(new.sum())
+    roster["season"] = season
+    return roster
+
+
+def _to_csv(df):
+    return df.to_csv(index=False).encode()
+
+
+def _to_xlsx(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def synthetic_files(data_dir, scale: int):
+    """Byte dei file sintetici (``stats``, ``roster``, ``roster_next``, ``teams``) e righe per tipo."""
+    data_dir = Path(data_dir)
+    base_stats = pd.read_excel(data_dir / "player_stats.xlsx")
+    base_roster = pd.read_csv(next(p for p in sorted(data_dir.glob("*.csv")) if cache.kind_for(p.name) == "roster"))
+    base_teams = pd.read_csv(data_dir / "teams.csv")
+
+    stats = synthetic_stats(base_stats, scale)
+    roster = synthetic_roster(base_roster, scale)
+    if "total_inches" not in roster.columns:
+        # Il roster fornito non ha l'altezza in pollici: la generiamo per il box plot
+        roster["total_inches"] = np.random.default_rng(scale).normal(71, 3, len(roster)).round()
+    files = {
+        "stats": _to_xlsx(stats),
+        "roster": _to_csv(roster.assign(season="2021-22")),
+        "roster_next": _to_csv(next_season(roster, "2022-23")),
+        "teams": _to_csv(synthetic_teams(base_teams, scale)),
+    }
+    return files, {"stats": len(stats), "roster": 2 * len(roster)}
+
+
+# ⏱️ **Fasi misurate**: (nome, preparazione non misurata, fase misurata)
+def stages(files: dict, cache_dir: Path) -> list:
+    def raw_stats():
+        return pd.read_excel(io.BytesIO(files["stats"]), sheet_name=0)
+
+    def raw_roster(key="roster"):
+        return pd.read_csv(io.BytesIO(files[key]))
+
+    def normalized_stats():
+        return schema.enforce(ingest.normalize_columns(raw_stats(), "upper"), "stats")
+
+    def stats():
+        return metrics.add_advanced_metrics(normalized_stats())
+
+    def roster(key="roster"):
+        return ingest.read_roster(files[key])
+
+    def fill_store(store, first, second):
+        store.add(first, "a")
+        store.add(second, "b")
+        return store
+
+    def clusters_input():
+        return clustering.player_features(aggregates.summarize(stats(), "PLAYER_NAME")["mean"])
+
+    prepared = {}
+
+    def figures_input():
+        # I grafici non modificano i dati: la preparazione si fa una volta per scala
+        if not prepared:
+            stats_df = stats()
+            store = fill_store(rosters.RosterStore(), roster(), roster("roster_next"))
+            prepared["args"] = (stats_df, aggregates.summarize(stats_df, "PLAYER_NAME"), store)
+        return prepared["args"]
+
+    def team_rows(stats_df):
+        return stats_df[stats_df["TEAM_NAME"] == stats_df["TEAM_NAME"].iloc[0]]
+
+    figure_builders = {
+        "impact": lambda stats_df, summary, store: figures.impact_bar(aggregates.top_players(summary, "IMPACT_SCORE")),
+        "team_bar": lambda stats_df, summary, store: figures.stat_bar(team_rows(stats_df), "POINTS", "PLAYER_NAME"),
+        "new_players": lambda stats_df, summary, store: figures.new_players_bar(store.team_counts()),
+        "geo": lambda stats_df, summary, store: charts.geo_figure(store.frame(), "Distribuzione geografica"),
+        "height_box": lambda stats_df, summary, store: charts.box_figure(
+            store.frame(), "season", "total_inches", "Altezze"),
+        "scatter3d": lambda stats_df, summary, store: charts.scatter3d_figure(
+            stats_df, "FIELD_GOAL_ATTEMPTS", "THREE_POINT_ATTEMPTS", "POINTS", "POINTS", "Viridis", 5),
+    }
+
+    def cache_round_trip(df):
+        path = cache_dir / "stats.feather"
+        cache.write_frame(df, path)
+        return cache.read_frame(path)
+
+    return [
+        ("ingest_stats", lambda: (), raw_stats),
+        ("ingest_roster", lambda: (), raw_roster),
+        ("normalize", lambda: (raw_stats(), raw_roster()),
+         lambda s, r: (schema.enforce(ingest.normalize_columns(s, "upper"), "stats"),
+                       schema.enforce(ingest.normalize_columns(r, "lower"), "roster"))),
+        ("ingest_teams", lambda: (files["teams"],), ingest.read_teams),
+        ("join_teams", lambda: (stats(), roster(), ingest.read_teams(files["teams"])),
+         lambda s, r, t: (rollups.join_stats(s, t), rollups.join_roster(r, t))),
+        ("cache_round_trip", lambda: (stats(),), cache_round_trip),
+        ("roster_concat_duplicated", lambda: (rosters.RosterStore(), roster(), roster("roster_next")), fill_store),
+        # Stesso lavoro di lettura + store, ma a blocchi con aggregati calcolati al volo
+        ("stream_roster", lambda: (), lambda: streaming.stream_roster(
+            io.BytesIO(files["roster"]), "a", cache_dir / "stream", chunksize=10_000)),
+        ("advanced_metrics", lambda: (normalized_stats(),), metrics.add_advanced_metrics),
+        ("aggregates", lambda: (stats(),),
+         lambda df: (aggregates.summarize(df, "PLAYER_NAME"), aggregates.summarize(df, "TEAM_NAME"))),
+        ("kmeans", lambda: (clusters_input(),), lambda features: clustering.fit_clusters(features, k=4)),
+    ] + [(f"figure_{name}", figures_input, build) for name, build in figure_builders.items()]
+
+
+def measure(setup, run, repeat: int = 3) -> dict:
+    """Tempo migliore su ``repeat`` esecuzioni e picco di memoria di un'esecuzione tracciata."""
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        run(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "mean_seconds": sum(times) / len(times), "peak_mb": peak / 2 ** 20}
+
+
+def run(data_dir, scales=DEFAULT_SCALES, repeat: int = 3, only: list = None, log=print) -> pd.DataFrame:
+    """Misura tutte le fasi (o solo quelle in ``only``) per ogni fattore di scala."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            files, rows = synthetic_files(data_dir, scale)
+            for name, setup, stage in stages(files, Path(tmp)):
+                if only and name not in only:
+                    continue
+                result = {"scale": scale, "stage": name, **rows, **measure(setup, stage, repeat)}
+                log(f"{scale:>4}x {name:<26} {result['seconds']:9.3f} s {result['peak_mb']:9.1f} MB")
+                results.append(result)
+    return pd.DataFrame(results)
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save(results: pd.DataFrame, out_dir) -> Path:
+    """Salva i risultati con commit, data e versioni; restituisce il percorso del file."""
+    commit = _commit()
+    now = datetime.now(timezone.utc)
+    payload = {
+        "commit": commit,
+        "created": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "results": results.to_dict(orient="records"),
+    }
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bench-{commit}-{now:%Y%m%dT%H%M%S}.json"
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return path
+
+
+def compare(results: pd.DataFrame, baseline_path) -> pd.DataFrame:
+    """Rapporto tempo/memoria rispetto a un file salvato da :func:`save` (>1 = più lento)."""
+    baseline = pd.DataFrame(json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"])
+    merged = results.merge(baseline, on=["scale", "stage"], suffixes=("", "_base"))
+    return merged.assign(
+        time_ratio=merged["seconds"] / merged["seconds_base"],
+        memory_ratio=merged["peak_mb"] / merged["peak_mb_base"],
+    )[["scale", "stage", "seconds_base", "seconds", "time_ratio", "peak_mb_base", "peak_mb", "memory_ratio"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi di analisi su dati sintetici.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Cartella con i file da replicare")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES, help="Fattori di scala")
+    parser.add_argument("--repeat", type=int, default=3, help="Esecuzioni per fase (si tiene la più veloce)")
+    parser.add_argument("--stage", action="append", help="Misura solo questa fase (ripetibile)")
+    parser.add_argument("--out", default="benchmarks", help="Cartella dove salvare i risultati")
+    parser.add_argument("--compare", help="File di risultati precedente da confrontare")
+    args = parser.parse_args(argv)
+
+    results = run(args.data_dir, args.scales, args.repeat, args.stage)
+    print(f"Risultati salvati in {save(results, args.out)}")
+    if args.compare:
+        print(compare(results, args.compare).to_string(index=False, float_format="{:.3f}".format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Cache colonnare su disco (Feather/Arrow) dei file caricati.
+
+Ogni file viene convertito una sola volta in un file Feather non compresso,
+identificato dall'hash del contenuto e dalla versione dello schema. Le
+letture successive usano il memory mapping invece di rianalizzare CSV/Excel.
+
+A ogni scrittura la cartella viene ripulita (:func:`prune`): si eliminano i
+file delle versioni precedenti dello schema e, oltre ``WBB_CACHE_MAX_MB``
+(default 1024), quelli usati meno di recente. Ogni lettura aggiorna la data
+di modifica del file, che fa quindi da ultimo uso.
+
+Pre-riscaldamento della cache dalla cartella ``data/``::
+
+    python -m wbb.cache data/
+"""
+import argparse
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from wbb import ingest, profiling, schema
+
+CACHE_DIR = Path(os.environ.get("WBB_CACHE_DIR", Path(__file__).resolve().parent.parent / ".cache"))
+MAX_BYTES = int(os.environ.get("WBB_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+# Solo i file scritti da load(): gli store a blocchi nelle sottocartelle non si toccano
+_CACHE_FILE = re.compile(r"^[a-z]+-v(\d+)-[0-9a-f]+\.feather$")
+
+READERS = {
+    "stats": ingest.read_stats,
+    "roster": ingest.read_roster,
+    "teams": ingest.read_teams,
+}
+
+
+def cache_path(kind: str, digest: str) -> Path:
+    """Percorso del file in cache per un contenuto di tipo ``kind``."""
+    return CACHE_DIR / f"{kind}-v{schema.SCHEMA_VERSION}-{digest}.feather"
+
+
+def kind_for(filename: str):
+    """Tipo di file (``stats``, ``roster``, ``teams``) dedotto dal nome, o ``None``."""
+    name = Path(filename).name.lower()
+    if name.endswith(".xlsx"):
+        return "stats"
+    if name.endswith(".csv"):
+        return "teams" if name.startswith("teams") else "roster"
+    return None
+
+
+def read_frame(path: Path) -> pd.DataFrame:
+    """Legge un file Feather dalla cache usando il memory mapping."""
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def write_frame(df: pd.DataFrame, path: Path) -> None:
+    """Scrive ``df`` in cache in modo atomico (file temporaneo + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def prune(max_bytes: int = None, keep: Path = None) -> list:
+    """Elimina i file di schemi precedenti e i meno usati oltre ``max_bytes`` (``keep`` resta sempre).
+
+    Restituisce i percorsi eliminati. File spariti nel frattempo (un altro
+    processo sta facendo pulizia) vengono ignorati.
+    """
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    current, stale = [], []
+    for path in CACHE_DIR.glob("*.feather"):
+        match = _CACHE_FILE.match(path.name)
+        if match is None:
+            continue
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if int(match.group(1)) != schema.SCHEMA_VERSION:
+            stale.append(path)
+        else:
+            current.append((stat.st_mtime, stat.st_size, path))
+
+    # Dal meno usato di recente, finché la cartella non rientra nel limite
+    total = sum(size for _, size, _ in current)
+    for _, size, path in sorted(current, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        if path != keep:
+            stale.append(path)
+            total -= size
+
+    removed = []
+    for path in stale:
+        try:
+            path.unlink()
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
+
+
+def load(kind: str, data: bytes, digest: str = None) -> pd.DataFrame:
+    """Restituisce il DataFrame di un file, dalla cache su disco se presente.
+
+    Se la cache non è leggibile o scrivibile si ricade sulla lettura diretta.
+    L'hash del contenuto resta in ``df.attrs["digest"]``, così le cache a valle
+    possono usarlo come chiave senza ricalcolarlo.
+    """
+    digest = digest or ingest.file_digest(data)
+    path = cache_path(kind, digest)
+    df = None
+    if path.exists():
+        try:
+            with profiling.timed(f"{kind}: feather"):
+                df = read_frame(path)
+            os.utime(path)  # Ultimo uso, per prune()
+        except (OSError, pa.ArrowInvalid):
+            pass  # File di cache corrotto: lo rigeneriamo
+
+    if df is None:
+        with profiling.timed(f"{kind}: parse"):
+            df = READERS[kind](data)
+        try:
+            with profiling.timed(f"{kind}: feather write"):
+                write_frame(df, path)
+            with profiling.timed("cache prune", kind="io"):
+                prune(keep=path)
+        except OSError:
+            pass  # Cartella non scrivibile: lavoriamo senza cache su disco
+    df.attrs["digest"] = digest
+    return df
+
+
+def warm(data_dir) -> list:
+    """Converte in cache tutti i file riconosciuti in ``data_dir``."""
+    written = []
+    for file in sorted(Path(data_dir).iterdir()):
+        kind = kind_for(file.name)
+        if kind is None:
+            continue
+        data = file.read_bytes()
+        load(kind, data)
+        written.append((file.name, cache_path(kind, ingest.file_digest(data))))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-riscalda la cache colonnare dai file in data/.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Cartella con roster, statistiche e squadre")
+    args = parser.parse_args(argv)
+
+    for name, path in warm(args.data_dir):
+        print(f"{name} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Grafici leggeri per dataset grandi: i dati vengono aggregati lato server.
+
+Invece di inviare al browser ogni riga si inviano conteggi per stato (mappa),
+quartili già calcolati (box plot) o punti raggruppati in celle (scatter 3D),
+entro un budget massimo di punti per grafico.
+"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+DEFAULT_POINT_BUDGET = 5000
+
+
+def state_counts(roster_df: pd.DataFrame, column: str = "state_clean") -> pd.DataFrame:
+    """Numero di giocatrici per stato, ordinato dal più numeroso."""
+    counts = roster_df[column].value_counts(dropna=True)
+    return counts.rename_axis(column).reset_index(name="giocatrici")
+
+
+def geo_figure(roster_df: pd.DataFrame, title: str) -> go.Figure:
+    """Mappa coropletica degli Stati Uniti con le giocatrici per stato."""
+    return geo_counts_figure(state_counts(roster_df), title)
+
+
+def geo_counts_figure(counts: pd.DataFrame, title: str) -> go.Figure:
+    """Mappa coropletica da conteggi già fatti (colonne ``state_clean`` e ``giocatrici``)."""
+    return px.choropleth(counts, locations="state_clean", locationmode="USA-states", color="giocatrici",
+                         scope="usa", color_continuous_scale="Blues", title=title)
+
+
+def box_stats(df: pd.DataFrame, x: str, y: str) -> pd.DataFrame:
+    """Quartili e baffi (1.5 IQR, come Plotly) di ``y`` per ogni valore di ``x``."""
+    values = df[y].astype(float)
+    groups = df[x].astype(str)
+    grouped = values.groupby(groups)
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    iqr = stats["q3"] - stats["q1"]
+    low = (stats["q1"] - 1.5 * iqr).reindex(groups).to_numpy()
+    high = (stats["q3"] + 1.5 * iqr).reindex(groups).to_numpy()
+    stats["lowerfence"] = values.where(values.to_numpy() >= low).groupby(groups).min()
+    stats["upperfence"] = values.where(values.to_numpy() <= high).groupby(groups).max()
+    stats["count"] = grouped.count()
+    return stats.dropna(subset=["median"])
+
+
+def box_stats_from_counts(counts: pd.Series) -> pd.DataFrame:
+    """Come :func:`box_stats`, ma da conteggi per (gruppo, valore) invece che dai valori.
+
+    Con valori discreti (es. altezze in pollici) il risultato è identico e i
+    conteggi si sommano blocco per blocco durante la lettura a blocchi.
+    """
+    rows = {}
+    for group, part in counts[counts > 0].groupby(level=0, sort=True):
+        part = part.droplevel(0).sort_index()
+        values, cum = part.index.to_numpy(dtype=float), part.cumsum().to_numpy()
+        # Quantile lineare come pandas: posizione p * (n - 1) nei valori ordinati
+        at = lambda k: values[np.searchsorted(cum, k, side="right")]
+        quartiles = []
+        for q in (0.25, 0.5, 0.75):
+            pos = q * (cum[-1] - 1)
+            lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+            quartiles.append(at(lo) + (at(hi) - at(lo)) * (pos - lo))
+        q1, median, q3 = quartiles
+        iqr = q3 - q1
+        rows[str(group)] = {
+            "q1": q1, "median": median, "q3": q3,
+            "lowerfence": values[values >= q1 - 1.5 * iqr].min(),
+            "upperfence": values[values <= q3 + 1.5 * iqr].max(),
+            "count": int(cum[-1]),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index", columns=["q1", "median", "q3", "lowerfence", "upperfence", "count"])
+
+
+def box_figure(df: pd.DataFrame, x: str, y: str, title: str) -> go.Figure:
+    """Box plot da quartili precalcolati: pochi numeri per gruppo invece di tutti i valori."""
+    return box_stats_figure(box_stats(df, x, y), x, y, title)
+
+
+def box_stats_figure(stats: pd.DataFrame, x: str, y: str, title: str) -> go.Figure:
+    """Box plot da una tabella come quella di :func:`box_stats` (un gruppo per riga)."""
+    fig = go.Figure(go.Box(
+        x=stats.index.tolist(),
+        q1=stats["q1"], median=stats["median"], q3=stats["q3"],
+        lowerfence=stats["lowerfence"], upperfence=stats["upperfence"],
+        name=y,
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def bin_points(df: pd.DataFrame, columns: list, budget: int = DEFAULT_POINT_BUDGET) -> pd.DataFrame:
+    """Riduce ``df`` ad al massimo ``budget`` punti raggruppandoli in celle regolari.
+
+    Ogni punto restituito è il baricentro di una cella con la colonna
+    ``COUNT`` (righe nella cella). Sotto il budget le righe restano invariate.
+    """
+    points = df[columns].dropna()
+    if len(points) <= budget:
+        return points.assign(COUNT=1)
+    bins = max(2, int(budget ** (1 / len(columns))))
+    cells = [pd.cut(points[col], bins, labels=False) for col in columns]
+    grouped = points.groupby(cells)
+    return grouped.mean().assign(COUNT=grouped.size()).reset_index(drop=True)
+
+
+def scatter3d_figure(df: pd.DataFrame, x: str, y: str, z: str, color: str, colorscale: str,
+                     size: int, budget: int = DEFAULT_POINT_BUDGET) -> go.Figure:
+    """Scatter 3D (WebGL) entro ``budget`` punti; le celle più dense hanno marker più grandi."""
+    points = bin_points(df, list(dict.fromkeys([x, y, z, color])), budget)
+    sizes = size
+    if points["COUNT"].max() > 1:
+        sizes = size * np.sqrt(points["COUNT"] / points["COUNT"].max()).clip(lower=0.3)
+    return go.Figure(data=[go.Scatter3d(
+        x=points[x],
+        y=points[y],
+        z=points[z],
+        mode="markers",
+        marker=dict(size=sizes, color=points[color], colorscale=colorscale, opacity=0.8),
+        customdata=points["COUNT"],
+        hovertemplate="%{x}, %{y}, %{z}<br>righe: %{customdata}<extra></extra>",
+    )])
+
+
+def scatter_render_mode(n_points: int, budget: int = DEFAULT_POINT_BUDGET) -> str:
+    """``"webgl"`` sopra il budget di punti, altrimenti SVG."""
+    return "webgl" if n_points > budget else "svg"
@@ -0,0 +1,83 @@
+"""Clustering delle giocatrici per stile di gioco e ricerca delle più simili.
+
+Il modello viene stimato sulle medie per giocatrice standardizzate. Di default
+si parte da zero (``n_init`` inizializzazioni di KMeans), così gli stessi dati
+danno sempre lo stesso risultato. Quando i dati cambiano (nuove partite dello
+stesso campionato) si può scegliere di ripartire dai centroidi precedenti.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+from wbb import ingest
+
+FEATURES = ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "MINUTES_PLAYED"]
+
+
+def player_features(player_means: pd.DataFrame, features=FEATURES) -> pd.DataFrame:
+    """Statistiche usate per il clustering, dalle medie per giocatrice (``summary["mean"]``)."""
+    return player_means[list(features)].dropna()
+
+
+def fingerprint(features: pd.DataFrame) -> str:
+    """Impronta del contenuto di ``features``, usata come chiave di cache."""
+    hashed = pd.util.hash_pandas_object(features, index=True).to_numpy()
+    return ingest.file_digest(hashed.tobytes() + ",".join(features.columns).encode())
+
+
+class PlayerClusters:
+    """Risultato del clustering con indice dei vicini già costruito."""
+
+    def __init__(self, features, scaler, model, method):
+        self.features = features
+        self.scaler = scaler
+        self.model = model
+        self.method = method
+        self.k = model.n_clusters
+        self.data_key = fingerprint(features)
+        self.scaled = scaler.transform(features.to_numpy())
+        self.data = features.assign(CLUSTER=model.predict(self.scaled))
+        self.neighbors = NearestNeighbors().fit(self.scaled)
+        self._positions = pd.Series(np.arange(len(features)), index=features.index)
+
+    def centroids(self) -> np.ndarray:
+        """Centroidi nella scala originale delle statistiche."""
+        return self.scaler.inverse_transform(self.model.cluster_centers_)
+
+    def similar(self, player: str, n: int = 5) -> pd.DataFrame:
+        """Le ``n`` giocatrici più vicine a ``player`` nello spazio standardizzato."""
+        if player not in self._positions.index:
+            return self.data.iloc[:0].assign(DISTANZA=[])
+        n_neighbors = min(n + 1, len(self.features))
+        pos = self._positions[player]
+        distances, indices = self.neighbors.kneighbors(self.scaled[pos:pos + 1], n_neighbors=n_neighbors)
+        found = [(i, d) for i, d in zip(indices[0], distances[0]) if i != pos][:n]
+        rows = [i for i, _ in found]
+        return self.data.iloc[rows].assign(DISTANZA=[d for _, d in found])
+
+
+def fit_clusters(features: pd.DataFrame, k: int = 4, method: str = "kmeans",
+                 previous: PlayerClusters = None, random_state: int = 42) -> PlayerClusters:
+    """Stima i cluster su ``features`` (una riga per giocatrice).
+
+    ``method`` è ``"kmeans"`` oppure ``"minibatch"`` (MiniBatchKMeans, più
+    veloce sui campionati grandi). Con ``previous`` dello stesso ``k`` e delle
+    stesse colonne i centroidi precedenti fanno da punto di partenza.
+    """
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(features.to_numpy())
+    k = min(k, len(features))
+
+    init, n_init = "k-means++", 10
+    if previous is not None and previous.k == k and list(previous.features.columns) == list(features.columns):
+        # I centroidi vanno riportati nella scala del nuovo scaler
+        init, n_init = scaler.transform(previous.centroids()), 1
+
+    if method == "minibatch":
+        model = MiniBatchKMeans(n_clusters=k, init=init, n_init=n_init, batch_size=1024, random_state=random_state)
+    else:
+        model = KMeans(n_clusters=k, init=init, n_init=n_init, random_state=random_state)
+    model.fit(scaled)
+    return PlayerClusters(features, scaler, model, method)
@@ -0,0 +1,120 @@
+"""Costruzione dei grafici Plotly, condivisa dall'app e dai report in batch.
+
+Ogni funzione riceve dati già filtrati o riassunti e restituisce una figura,
+senza chiamate a Streamlit.
+"""
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+
+def player_stats_line(player_stats: pd.DataFrame, player: str) -> go.Figure:
+    return px.line(player_stats, x="GAMES", y=["POINTS", "ASSISTS", "TOTAL_REBOUNDS"],
+                   title=f"Andamento delle Statistiche di {player}", markers=True)
+
+
+def shot_map(player_stats: pd.DataFrame, player: str) -> go.Figure:
+    return px.scatter(player_stats, x="FIELD_GOAL_ATTEMPTS", y="FIELD_GOAL_PERCENTAGE",
+                      size="FIELD_GOALS_MADE", color="FIELD_GOAL_PERCENTAGE",
+                      title=f"Mappa di tiro di {player}")
+
+
+def team_comparison_bar(team_vs_player: pd.DataFrame, player: str) -> go.Figure:
+    return px.bar(team_vs_player, x="Statistica", y=["Giocatrice", "Media Squadra"],
+                  title=f"Confronto {player} vs Media Squadra", barmode="group")
+
+
+def streak_line(player_stats: pd.DataFrame, player: str) -> go.Figure:
+    return px.line(player_stats, x="GAMES", y="POINTS", markers=True,
+                   title=f"Hot & Cold Streak di {player}",
+                   color=player_stats["HOT_STREAK"].map({True: "Hot", False: "Cold"}))
+
+
+def efficiency_line(player_stats: pd.DataFrame, player: str) -> go.Figure:
+    return px.line(player_stats, x="GAMES", y=["TS_PCT", "USG_PCT"], markers=True,
+                   title=f"Efficienza Avanzata di {player}", labels={"value": "Percentuale", "variable": "Statistica"})
+
+
+def momentum_line(player_stats: pd.DataFrame, player: str) -> go.Figure:
+    return px.line(player_stats, x="GAMES", y="MOMENTUM", markers=True,
+                   title=f"Momentum e Clutch Performance di {player}")
+
+
+def impact_bar(top_impact: pd.DataFrame) -> go.Figure:
+    return px.bar(top_impact, x="PLAYER_NAME", y="IMPACT_SCORE", title="Top 10 Giocatrici per Impatto",
+                  color="IMPACT_SCORE")
+
+
+def new_players_bar(team_counts: pd.DataFrame) -> go.Figure:
+    return px.bar(team_counts, x="season", y="new_player", color="team",
+                  title="Nuove Giocatrici per Squadra", barmode="stack")
+
+
+def turnover_bar(team_counts: pd.DataFrame) -> go.Figure:
+    return px.bar(team_counts, x="season", y="player_id", color="team",
+                  title="Turnover delle Giocatrici per Squadra", barmode="stack")
+
+
+def stat_bar(team_data: pd.DataFrame, stat: str, name_column: str) -> go.Figure:
+    """Barre di ``stat`` per ogni giocatrice della squadra."""
+    return px.bar(team_data, x=name_column, y=stat, title=f"{stat} per giocatrice", color=name_column)
+
+
+def stat_histogram(team_data: pd.DataFrame, stat: str) -> go.Figure:
+    return px.histogram(team_data, x=stat, nbins=10, title=f"Distribuzione di {stat}",
+                        color_discrete_sequence=["#1f77b4"])
+
+
+def stat_scatter(team_data: pd.DataFrame, x: str, y: str, name_column: str) -> go.Figure:
+    fig = px.scatter(team_data, x=x, y=y, text=name_column, title=f"Confronto {x} vs {y}",
+                     color=name_column, size_max=15)
+    return fig.update_traces(textposition="top center")
+
+
+def position_bar(team_data: pd.DataFrame) -> go.Figure:
+    return px.bar(team_data, x="position", title="Distribuzione per posizione", color="position",
+                  category_orders={"position": sorted(team_data["position"].dropna().unique())})
+
+
+def radar(rows: pd.DataFrame, stat_columns: list, name_column: str) -> go.Figure:
+    """Radar con una traccia per riga di ``rows``."""
+    fig = go.Figure()
+    for _, row in rows.iterrows():
+        fig.add_trace(go.Scatterpolar(
+            r=row[stat_columns].values,
+            theta=stat_columns,
+            fill="toself",
+            name=row[name_column]
+        ))
+    return fig.update_layout(title="📡 Radar Chart Statistiche")
+
+
+def compare_bar(compare_df: pd.DataFrame, player1: str, player2: str) -> go.Figure:
+    return px.bar(compare_df, x="Statistiche", y=[player1, player2],
+                  title=f"Confronto {player1} vs {player2}", barmode="group")
+
+
+def trend_line(players_stats: pd.DataFrame, player1: str, player2: str) -> go.Figure:
+    return px.line(players_stats, x="GAMES", y="POINTS", color="PLAYER_NAME",
+                   title=f"Andamento dei Punti nel Tempo: {player1} vs {player2}", markers=True)
+
+
+def compare_radar(compare_df: pd.DataFrame, player1: str, player2: str) -> go.Figure:
+    return px.line_polar(compare_df.melt(id_vars="Statistiche"), r="value", theta="Statistiche",
+                         color="variable", line_close=True,
+                         title=f"Radar Chart: {player1} vs {player2}")
+
+
+def moves_bar(team_moves: pd.DataFrame, title: str) -> go.Figure:
+    """Movimenti per stagione (confermate, arrivi, trasferimenti, partenze) in barre raggruppate."""
+    columns = ["retained", "arriving", "transfer_in", "transfer_out", "departing"]
+    totals = team_moves.groupby("season", observed=True)[columns].sum().reset_index()
+    return px.bar(totals, x="season", y=columns, title=title, barmode="group",
+                  labels={"value": "Giocatrici", "variable": "Movimento"})
+
+
+def rollup_bar(leaders: pd.DataFrame, level: str, stat: str) -> go.Figure:
+    """Classifica di un riepilogo gerarchico: una barra per gruppo di ``level``."""
+    data = leaders.reset_index()
+    return px.bar(data, x=level, y=stat, color=data.columns[0], title=f"{stat} medio per {level}",
+                  hover_data=["RIGHE"])
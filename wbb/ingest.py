@@ -0,0 +1,66 @@
+"""Lettura dei file caricati: ogni file viene analizzato una sola volta.
+
+Le funzioni lavorano sui byte del file e sono indipendenti da Streamlit,
+cosi' l'app puo' metterle in cache usando l'hash del contenuto come chiave.
+"""
+import hashlib
+import io
+
+import pandas as pd
+
+from wbb import metrics, schema
+
+
+def file_digest(data: bytes) -> str:
+    """Hash del contenuto di un file, usato come chiave di cache."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def path_digest(path, block_size: int = 1 << 20) -> str:
+    """Come :func:`file_digest`, ma leggendo il file a pezzi (per file molto grandi)."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def normalize_columns(df: pd.DataFrame, case: str = "upper") -> pd.DataFrame:
+    """Rimuove gli spazi dai nomi delle colonne e ne uniforma il maiuscolo/minuscolo."""
+    columns = df.columns.str.strip()
+    df.columns = columns.str.upper() if case == "upper" else columns.str.lower()
+    return df
+
+
+def read_stats(data: bytes) -> pd.DataFrame:
+    """Legge il file Excel delle statistiche con le colonne in MAIUSCOLO e le metriche avanzate."""
+    df = pd.read_excel(io.BytesIO(data), sheet_name=0)
+    # Metriche calcolate prima della conversione, così anche le colonne derivate diventano compatte
+    return schema.enforce(metrics.add_advanced_metrics(normalize_columns(df, "upper")), "stats")
+
+
+def lower_view(df: pd.DataFrame) -> pd.DataFrame:
+    """Vista con le colonne in minuscolo che condivide i dati con ``df``."""
+    view = df.copy(deep=False)
+    view.columns = view.columns.str.lower()
+    return view
+
+
+def shared_view(df: pd.DataFrame) -> pd.DataFrame:
+    """Vista di un DataFrame condiviso tra le sessioni: i dati restano in comune,
+    eventuali modifiche (Copy-on-Write) restano locali alla vista."""
+    view = df.copy(deep=False)
+    view.attrs = dict(df.attrs)
+    return view
+
+
+def read_roster(data: bytes) -> pd.DataFrame:
+    """Legge un file CSV di roster con le colonne in minuscolo."""
+    df = pd.read_csv(io.BytesIO(data))
+    return schema.enforce(normalize_columns(df, "lower"), "roster")
+
+
+def read_teams(data: bytes) -> pd.DataFrame:
+    """Legge il file CSV delle squadre con le colonne in minuscolo."""
+    df = pd.read_csv(io.BytesIO(data))
+    return schema.enforce(normalize_columns(df, "lower"), "teams")
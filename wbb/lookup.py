@@ -0,0 +1,52 @@
+"""Indici per giocatrice e per squadra, costruiti una volta per DataFrame.
+
+Invece di confrontare ogni volta l'intera colonna con il nome selezionato, si
+ordinano una sola volta le posizioni delle righe per chiave: ogni selezione
+diventa una fetta della tabella degli offset.
+"""
+import numpy as np
+import pandas as pd
+
+
+def normalize_name(values: pd.Series) -> pd.Series:
+    """Nomi senza spazi ai lati e in maiuscolo, per evitare errori di formattazione."""
+    return values.astype(object).str.strip().str.upper()
+
+
+class GroupIndex:
+    """Righe di ``df`` raggruppate per ``column`` tramite una tabella di offset.
+
+    Con ``normalize=True`` le chiavi (e la colonna nelle righe restituite)
+    passano per :func:`normalize_name`.
+    """
+
+    def __init__(self, df: pd.DataFrame, column: str, normalize: bool = False):
+        self.df = df
+        self.column = column
+        self.normalize = normalize
+
+        values = normalize_name(df[column]) if normalize else df[column]
+        codes, uniques = pd.factorize(values)
+        # Ordinamento stabile: dentro ogni gruppo resta l'ordine originale
+        self._positions = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        start = int((codes < 0).sum())
+        offsets = start + np.concatenate([[0], np.cumsum(counts)])
+        self.keys = list(uniques)  # ordine di prima comparsa, come unique()
+        self.sorted_keys = sorted(self.keys)  # elenco per i menu di selezione
+        self._slices = {key: (offsets[i], offsets[i + 1]) for i, key in enumerate(self.keys)}
+
+    def __contains__(self, key):
+        return key in self._slices
+
+    def get(self, key) -> pd.DataFrame:
+        """Righe con chiave ``key`` (DataFrame vuoto se la chiave non esiste)."""
+        start, stop = self._slices.get(key, (0, 0))
+        rows = self.df.take(self._positions[start:stop])
+        if self.normalize:
+            rows = rows.assign(**{self.column: key})
+        return rows
+
+    def get_many(self, keys) -> pd.DataFrame:
+        """Righe per più chiavi, nell'ordine indicato e senza duplicati."""
+        return pd.concat([self.get(key) for key in dict.fromkeys(keys)])
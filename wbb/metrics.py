@@ -0,0 +1,89 @@
+"""Metriche avanzate per tutte le giocatrici, in un solo passaggio vettoriale.
+
+Le metriche per partita (TS%, USG%, impatto) sono operazioni colonna per
+colonna; momentum e streak usano finestre mobili raggruppate per giocatrice,
+nell'ordine delle partite (colonna ``GAMES``).
+"""
+import numpy as np
+import pandas as pd
+
+STREAK_WINDOW = 3
+HOT_THRESHOLD = 20
+COLD_THRESHOLD = 5
+
+IMPACT_COLUMNS = ["POINTS", "TOTAL_REBOUNDS", "ASSISTS", "STEALS", "BLOCKS", "TURNOVERS"]
+EFFICIENCY_COLUMNS = ["POINTS", "FIELD_GOAL_ATTEMPTS", "FREE_THROW_ATTEMPTS", "TURNOVERS", "MINUTES_PLAYED"]
+
+
+def _has(df, columns):
+    return all(col in df.columns for col in columns)
+
+
+def impact_score(stats_df: pd.DataFrame) -> pd.Series:
+    """Indice d'impatto: punti + rimbalzi + assist + rubate + stoppate - palle perse."""
+    return (stats_df["POINTS"] + stats_df["TOTAL_REBOUNDS"] + stats_df["ASSISTS"]
+            + stats_df["STEALS"] + stats_df["BLOCKS"]) - stats_df["TURNOVERS"]
+
+
+def true_shooting(stats_df: pd.DataFrame) -> pd.Series:
+    """True Shooting Percentage (TS%)."""
+    attempts = 2 * (stats_df["FIELD_GOAL_ATTEMPTS"] + 0.44 * stats_df["FREE_THROW_ATTEMPTS"])
+    return (stats_df["POINTS"] / attempts).replace([np.inf, -np.inf], np.nan)
+
+
+def usage_rate(stats_df: pd.DataFrame) -> pd.Series:
+    """Usage Rate (USG%) per minuto giocato."""
+    possessions = stats_df["FIELD_GOAL_ATTEMPTS"] + 0.44 * stats_df["FREE_THROW_ATTEMPTS"] + stats_df["TURNOVERS"]
+    return (100 * possessions / stats_df["MINUTES_PLAYED"]).replace([np.inf, -np.inf], np.nan)
+
+
+def _run_length(flags: pd.Series, groups: pd.Series) -> pd.Series:
+    """Lunghezza della serie consecutiva di ``True`` fino a ogni riga, per gruppo."""
+    new_run = flags.ne(flags.groupby(groups, observed=True).shift())
+    run_id = new_run.cumsum()
+    return (flags.groupby(run_id).cumcount() + 1).where(flags, 0)
+
+
+def add_row_metrics(stats_df: pd.DataFrame) -> pd.DataFrame:
+    """Aggiunge le metriche che dipendono solo dalla riga: ``TS_PCT``, ``USG_PCT`` e ``IMPACT_SCORE``.
+
+    Si possono calcolare anche un blocco di righe alla volta (lettura a blocchi).
+    """
+    if _has(stats_df, EFFICIENCY_COLUMNS):
+        stats_df["TS_PCT"] = true_shooting(stats_df)
+        stats_df["USG_PCT"] = usage_rate(stats_df)
+    if _has(stats_df, IMPACT_COLUMNS):
+        stats_df["IMPACT_SCORE"] = impact_score(stats_df)
+    return stats_df
+
+
+def add_advanced_metrics(stats_df: pd.DataFrame) -> pd.DataFrame:
+    """Aggiunge a ``stats_df`` le metriche avanzate per tutte le giocatrici.
+
+    Colonne aggiunte (se ci sono i dati necessari): ``TS_PCT``, ``USG_PCT``,
+    ``IMPACT_SCORE``, ``MOMENTUM``, ``HOT_STREAK``, ``COLD_STREAK``,
+    ``HOT_STREAK_LEN`` e ``COLD_STREAK_LEN``.
+    """
+    add_row_metrics(stats_df)
+
+    if _has(stats_df, ["PLAYER_NAME", "GAMES", "POINTS"]):
+        # Ordine delle partite per giocatrice; i risultati tornano allineati all'indice originale
+        ordered = stats_df[["PLAYER_NAME", "GAMES", "POINTS"]].reset_index(drop=True)
+        ordered = ordered.sort_values(["PLAYER_NAME", "GAMES"], kind="stable")
+        points = ordered.groupby("PLAYER_NAME", sort=False, observed=True)["POINTS"]
+        rolling = points.rolling(STREAK_WINDOW).mean().droplevel(0)
+        momentum = points.rolling(STREAK_WINDOW, min_periods=1).mean().droplevel(0)
+
+        hot = (rolling > HOT_THRESHOLD).reindex(ordered.index)
+        cold = (rolling < COLD_THRESHOLD).reindex(ordered.index)
+        players = ordered["PLAYER_NAME"]
+        derived = pd.DataFrame({
+            "MOMENTUM": momentum.reindex(ordered.index),
+            "HOT_STREAK": hot,
+            "COLD_STREAK": cold,
+            "HOT_STREAK_LEN": _run_length(hot, players),
+            "COLD_STREAK_LEN": _run_length(cold, players),
+        }).sort_index()
+        for col in derived.columns:
+            stats_df[col] = derived[col].to_numpy()
+    return stats_df
@@ -0,0 +1,116 @@
+"""Misura dei tempi di un rerun, sezione per sezione e chiamata per chiamata.
+
+La misura è attiva solo dentro :func:`profiling`; altrimenti :func:`timed` e
+:func:`miss` non fanno nulla, così i moduli di analisi possono chiamarle
+sempre. Le chiamate in cache partono come ``"hit"``: se il corpo della
+funzione in cache viene eseguito, :func:`miss` le segna come ``"miss"``.
+"""
+import contextvars
+import cProfile
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+PROFILE_DIR = Path(os.environ.get("WBB_PROFILE_DIR", Path(__file__).resolve().parent.parent / ".profiles"))
+
+_active = contextvars.ContextVar("wbb_profile", default=None)
+
+
+class Profile:
+    """Tempi annidati di un rerun: una riga per sezione o chiamata misurata.
+
+    Le attese dei calcoli in background (``kind="wait"``) riportano anche in
+    ``compute`` i secondi di calcolo misurati nel worker.
+    """
+
+    def __init__(self, name: str = "rerun"):
+        self.name = name
+        self.records = []
+        self.started = datetime.now(timezone.utc)
+        self.seconds = None
+        self._stack = []
+
+    @contextmanager
+    def timed(self, name: str, kind: str = "call", cached: bool = False):
+        record = {"name": name, "kind": kind, "depth": len(self._stack),
+                  "cache": "hit" if cached else None, "seconds": None}
+        self.records.append(record)
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self._stack.pop()
+
+    def miss(self):
+        """Segna come ``"miss"`` la chiamata in cache più interna ancora aperta."""
+        for record in reversed(self._stack):
+            if record["cache"] is not None:
+                record["cache"] = "miss"
+                return
+
+    def to_frame(self) -> pd.DataFrame:
+        """Tabella dei tempi, con il nome rientrato secondo l'annidamento."""
+        df = pd.DataFrame(self.records, columns=["name", "kind", "depth", "cache", "seconds", "compute"])
+        return df.assign(name=["  " * depth + name for depth, name in zip(df["depth"], df["name"])])
+
+    def to_record(self, **extra) -> dict:
+        return {"time": self.started.isoformat(timespec="milliseconds"), "name": self.name,
+                "seconds": self.seconds, **extra, "records": self.records}
+
+
+def current():
+    """Profilo attivo nel rerun corrente, o ``None``."""
+    return _active.get()
+
+
+def timed(name: str, kind: str = "call", cached: bool = False):
+    """Misura il blocco nel profilo attivo (nessun effetto se la profilazione è spenta)."""
+    profile = _active.get()
+    return profile.timed(name, kind, cached) if profile is not None else nullcontext()
+
+
+def miss():
+    profile = _active.get()
+    if profile is not None:
+        profile.miss()
+
+
+@contextmanager
+def profiling(name: str = "rerun", cprofile_path=None):
+    """Attiva un :class:`Profile` per il blocco; con ``cprofile_path`` salva anche un dump cProfile."""
+    profile = Profile(name)
+    token = _active.set(profile)
+    profiler = cProfile.Profile() if cprofile_path else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            Path(cprofile_path).parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(cprofile_path)
+        profile.seconds = time.perf_counter() - start
+        _active.reset(token)
+
+
+def write_jsonl(profile: Profile, path=None, **extra) -> Path:
+    """Aggiunge il profilo come riga JSON al file di log (default ``PROFILE_DIR/reruns.jsonl``)."""
+    path = Path(path) if path else PROFILE_DIR / "reruns.jsonl"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as log:
+        log.write(json.dumps(profile.to_record(**extra), default=str, ensure_ascii=False) + "\n")
+    return path
+
+
+def cprofile_path(name: str) -> Path:
+    """Percorso per un nuovo dump cProfile in ``PROFILE_DIR``."""
+    return PROFILE_DIR / f"{name}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}.prof"
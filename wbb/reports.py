@@ -0,0 +1,259 @@
+"""Report statici per squadra e per giocatrice, generati senza Streamlit.
+
+Per ogni squadra di ``teams.csv`` viene scritta una cartella con una pagina
+HTML (tabelle e grafici della squadra) e una pagina per giocatrice; le squadre
+delle statistiche che non corrispondono a nessuna riga di ``teams.csv`` hanno
+comunque il loro report e sono elencate a parte nell'indice. Le squadre
+sono distribuite su un pool di processi; ogni processo carica i dati una sola
+volta, dalla cache colonnare su disco (vedi :mod:`wbb.cache`).
+
+Generazione notturna dei report::
+
+    python -m wbb.reports data/ --out reports/ --workers 8 [--png]
+"""
+import argparse
+import html
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from wbb import aggregates, cache, charts, figures, rosters
+from wbb.lookup import GroupIndex, normalize_name
+
+PLOTLY_JS = "cdn"
+
+
+class League:
+    """Dati della lega già letti, riassunti e indicizzati, pronti per i report."""
+
+    def __init__(self, stats_df: pd.DataFrame = None, roster_store: rosters.RosterStore = None,
+                 teams_df: pd.DataFrame = None):
+        self.stats_df = stats_df
+        self.roster_store = roster_store
+        self.teams_df = teams_df
+        if stats_df is not None:
+            self.player_summary = aggregates.summarize(stats_df, "PLAYER_NAME")
+            self.team_summary = aggregates.summarize(stats_df, "TEAM_NAME")
+            self.player_index = GroupIndex(stats_df, "PLAYER_NAME")
+            self.team_index = GroupIndex(stats_df, "TEAM_NAME", normalize=True)
+        if roster_store is not None and roster_store.files:
+            self.roster_index = roster_store.index("team", normalize=True)
+        else:
+            self.roster_index = None
+
+    def team_key(self, *names):
+        """Chiave normalizzata della prima tra ``names`` presente nelle statistiche (None se nessuna)."""
+        if self.stats_df is None:
+            return None
+        for name in names:
+            key = _key(name)
+            if key in self.team_index:
+                return key
+        return None
+
+    def team_stats(self, *names) -> pd.DataFrame:
+        """Statistiche della prima tra ``names`` presente nei dati (DataFrame vuoto se nessuna)."""
+        if self.stats_df is None:
+            return pd.DataFrame()
+        key = self.team_key(*names)
+        return self.team_index.get(key) if key is not None else self.stats_df.iloc[:0]
+
+    def unmatched_teams(self) -> list:
+        """Squadre delle statistiche che nessuna riga di ``teams.csv`` raggiunge (nome come nel file)."""
+        if self.stats_df is None:
+            return []
+        matched = set()
+        if self.teams_df is not None:
+            matched = {self.team_key(team.get("stats_name"), team["team"]) for _, team in self.teams_df.iterrows()}
+        names = {}
+        for name in self.stats_df["TEAM_NAME"].dropna().astype(object).unique():
+            names.setdefault(_key(name), name)
+        return sorted(name for key, name in names.items() if key not in matched)
+
+    def team_roster(self, name) -> pd.DataFrame:
+        if self.roster_index is None:
+            return pd.DataFrame()
+        return self.roster_index.get(_key(name))
+
+
+def _key(name):
+    if not isinstance(name, str):
+        return None
+    return normalize_name(pd.Series([name])).iloc[0]
+
+
+def load_league(data_dir) -> League:
+    """Legge statistiche, roster e squadre da ``data_dir`` passando per la cache su disco."""
+    stats_df = teams_df = None
+    store = rosters.RosterStore()
+    for file in sorted(Path(data_dir).iterdir()):
+        kind = cache.kind_for(file.name)
+        if kind is None:
+            continue
+        df = cache.load(kind, file.read_bytes())
+        if kind == "stats":
+            stats_df = df
+        elif kind == "teams":
+            teams_df = df
+        else:
+            store.add(df, df.attrs["digest"], season=rosters.season_from_filename(file.name))
+    return League(stats_df, store, teams_df)
+
+
+def slugify(name: str) -> str:
+    """Nome di file sicuro per una squadra o una giocatrice."""
+    return re.sub(r"[^a-z0-9]+", "-", str(name).lower()).strip("-") or "senza-nome"
+
+
+def _page(title: str, blocks: list) -> str:
+    body = "\n".join(blocks)
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title></head>\n"
+            f"<body>\n<h1>{html.escape(title)}</h1>\n{body}\n</body></html>\n")
+
+
+def _table(title: str, df: pd.DataFrame) -> str:
+    return f"<h2>{html.escape(title)}</h2>\n{df.to_html(index=False, na_rep='', float_format='{:.2f}'.format)}"
+
+
+def _figures(figs: dict, folder: Path, png: bool) -> list:
+    """Blocchi HTML dei grafici; con ``png`` salva anche un'immagine statica per grafico."""
+    blocks = []
+    for name, fig in figs.items():
+        blocks.append(fig.to_html(full_html=False, include_plotlyjs=PLOTLY_JS))
+        if png:
+            fig.write_image(folder / f"{name}.png")
+    return blocks
+
+
+def player_report(league: League, player: str, folder: Path, png: bool = False) -> Path:
+    """Pagina HTML con statistiche e grafici di una giocatrice."""
+    player_stats = league.player_index.get(player).sort_values("GAMES")
+    team = player_stats["TEAM_NAME"].iloc[0]
+    figs = {"statistiche": figures.player_stats_line(player_stats, player)}
+    if "FIELD_GOAL_PERCENTAGE" in player_stats.columns:
+        figs["tiro"] = figures.shot_map(player_stats, player)
+    figs["squadra"] = figures.team_comparison_bar(
+        aggregates.team_vs_player(league.player_summary, league.team_summary, player, team), player)
+    if "TS_PCT" in player_stats.columns:
+        figs["efficienza"] = figures.efficiency_line(player_stats, player)
+
+    folder.mkdir(parents=True, exist_ok=True)
+    blocks = [_table("Statistiche", player_stats)] + _figures(figs, folder, png)
+    path = folder / "index.html"
+    path.write_text(_page(player, blocks), encoding="utf-8")
+    return path
+
+
+def team_report(league: League, team: pd.Series, out_dir: Path, png: bool = False, folder: str = None) -> dict:
+    """Report di una squadra (riga di ``teams.csv``) e delle sue giocatrici.
+
+    ``folder`` sostituisce il nome della cartella ricavato da ``team["team"]``.
+    """
+    folder = Path(out_dir) / (folder or slugify(team["team"]))
+    folder.mkdir(parents=True, exist_ok=True)
+    team_stats = league.team_stats(team.get("stats_name"), team["team"])
+    team_roster = league.team_roster(team["team"])
+
+    blocks, figs, players = [], {}, []
+    info = team.drop(labels=["url"], errors="ignore").to_frame().T
+    blocks.append(_table("Squadra", info))
+    if not team_stats.empty:
+        blocks.append(_table("Statistiche delle giocatrici", team_stats))
+        figs["punti"] = figures.stat_bar(team_stats, "POINTS", "PLAYER_NAME")
+        if "IMPACT_SCORE" in team_stats.columns:
+            figs["impatto"] = figures.stat_bar(team_stats, "IMPACT_SCORE", "PLAYER_NAME")
+        for player in team_stats["PLAYER_NAME"].unique():
+            page = player_report(league, player, folder / slugify(player), png)
+            players.append(f"<li><a href=\"{page.relative_to(folder).as_posix()}\">{html.escape(player)}</a></li>")
+    if not team_roster.empty:
+        blocks.append(_table("Roster", team_roster))
+        figs["posizioni"] = figures.position_bar(team_roster)
+        if "total_inches" in team_roster.columns and team_roster["total_inches"].notna().any():
+            figs["altezze"] = charts.box_figure(team_roster, "season", "total_inches", "Altezze per stagione")
+
+    blocks += _figures(figs, folder, png)
+    if players:
+        blocks.append("<h2>Giocatrici</h2>\n<ul>\n" + "\n".join(players) + "\n</ul>")
+    (folder / "index.html").write_text(_page(team["team"], blocks), encoding="utf-8")
+    return {"team": team["team"], "folder": folder.name, "giocatrici": len(players), "roster": len(team_roster)}
+
+
+# 🧵 **Pool di processi**: ogni worker carica la lega una volta sola
+_league = None
+
+
+def _init_worker(data_dir):
+    global _league
+    _league = load_league(data_dir)
+
+
+def _run_team(job):
+    team, out_dir, png, folder = job
+    return team_report(_league, team, out_dir, png, folder)
+
+
+def _links(results: pd.DataFrame) -> str:
+    links = results.assign(team=[f"<a href=\"{folder}/index.html\">{html.escape(name)}</a>"
+                                 for name, folder in zip(results["team"], results["folder"])])
+    return links.drop(columns=["folder", "teams_csv"]).to_html(index=False, escape=False)
+
+
+def generate(data_dir, out_dir, workers: int = None, png: bool = False) -> pd.DataFrame:
+    """Genera i report di tutte le squadre e un indice ``index.html`` in ``out_dir``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cache.warm(data_dir)  # I worker leggono poi tutti dalla cache già pronta
+    league = load_league(data_dir)
+    teams_df = league.teams_df
+    if teams_df is None:
+        raise FileNotFoundError(f"Nessun file teams*.csv in {data_dir}")
+
+    jobs = [(team, out_dir, png, None) for _, team in teams_df.iterrows()]
+    # Squadre solo nelle statistiche (nome diverso o assenti da teams.csv): report con il nome
+    # del file di statistiche, in una cartella che non si sovrappone a quelle di teams.csv
+    used = {slugify(name) for name in teams_df["team"]}
+    unmatched = league.unmatched_teams()
+    for name in unmatched:
+        folder = slugify(name)
+        if folder in used:
+            folder = f"{folder}-stats"
+        used.add(folder)
+        jobs.append((pd.Series({"team": name, "stats_name": name}), out_dir, png, folder))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+        results = pd.DataFrame(list(pool.map(_run_team, jobs, chunksize=8)))
+    results["teams_csv"] = [True] * len(teams_df) + [False] * len(unmatched)
+
+    blocks = [_links(results[results["teams_csv"]])]
+    if unmatched:
+        blocks.append(f"<h2>Squadre delle statistiche senza riga in teams.csv ({len(unmatched)})</h2>\n"
+                      + _links(results[~results["teams_csv"]]))
+    (out_dir / "index.html").write_text(_page("Report per squadra", blocks), encoding="utf-8")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera i report statici per squadra e per giocatrice.")
+    parser.add_argument("data_dir", nargs="?", default="data", help="Cartella con roster, statistiche e squadre")
+    parser.add_argument("--out", default="reports", help="Cartella di destinazione dei report")
+    parser.add_argument("--workers", type=int, default=None, help="Processi in parallelo (default: CPU disponibili)")
+    parser.add_argument("--png", action="store_true", help="Salva anche i grafici in PNG (richiede kaleido)")
+    args = parser.parse_args(argv)
+
+    if args.png:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            parser.error("--png richiede il pacchetto kaleido (pip install kaleido)")
+
+    results = generate(args.data_dir, args.out, args.workers, args.png)
+    print(f"{len(results)} squadre, {int(results['giocatrici'].sum())} giocatrici -> {Path(args.out) / 'index.html'}")
+    unmatched = results.loc[~results["teams_csv"], "team"].tolist()
+    if unmatched:
+        print(f"{len(unmatched)} squadre delle statistiche senza riga in teams.csv: {', '.join(unmatched)}")
+
+
+if __name__ == "__main__":
+    main()
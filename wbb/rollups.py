@@ -0,0 +1,171 @@
+"""Collegamento con ``teams.csv`` e riepiloghi gerarchici division → conference → squadra → giocatrice.
+
+Il roster ha già ``ncaa_id``; le statistiche passano dal nome squadra
+(``TEAM_NAME`` = ``stats_name`` di ``teams.csv``) per ottenerlo. Conference,
+division e stato arrivano poi da ``teams.csv`` con un join su ``ncaa_id``.
+
+:class:`Rollup` conserva somme e conteggi a ogni livello della gerarchia:
+sono additivi, quindi nuove righe aggiornano solo i gruppi che toccano e le
+medie di un livello sono sempre una lettura, non un groupby sulla lega intera.
+"""
+import pandas as pd
+
+from wbb.lookup import normalize_name
+
+UNKNOWN = "N/D"
+
+TEAM_COLUMNS = ["conference", "division", "team_state"]
+STATS_LEVELS = ["DIVISION", "CONFERENCE", "TEAM_NAME", "PLAYER_NAME"]
+ROSTER_LEVELS = ["division", "conference", "team"]
+
+
+def _team_info(teams_df: pd.DataFrame) -> pd.DataFrame:
+    return teams_df.dropna(subset=["ncaa_id"]).drop_duplicates("ncaa_id").set_index("ncaa_id")[TEAM_COLUMNS]
+
+
+def _fill_levels(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    # Squadre senza corrispondenza in teams.csv: restano nei riepiloghi sotto "N/D"
+    return df.assign(**{col: df[col].astype(object).fillna(UNKNOWN).astype("category") for col in columns})
+
+
+def join_roster(roster_df: pd.DataFrame, teams_df: pd.DataFrame) -> pd.DataFrame:
+    """Roster con conference, division e stato presi da ``teams.csv`` (join su ``ncaa_id``)."""
+    info = _team_info(teams_df)
+    joined = roster_df.drop(columns=TEAM_COLUMNS, errors="ignore").join(info, on="ncaa_id")
+    return _fill_levels(joined, ["conference", "division"])
+
+
+def join_stats(stats_df: pd.DataFrame, teams_df: pd.DataFrame) -> pd.DataFrame:
+    """Statistiche con ``NCAA_ID``, ``CONFERENCE``, ``DIVISION`` e ``TEAM_STATE`` da ``teams.csv``.
+
+    ``TEAM_NAME`` viene confrontato con ``stats_name`` (e, in mancanza, con
+    ``team``) dopo la normalizzazione di spazi e maiuscole.
+    """
+    names = teams_df.dropna(subset=["ncaa_id"])
+    by_name = pd.concat([
+        pd.Series(names["ncaa_id"].to_numpy(), index=normalize_name(names["stats_name"])),
+        pd.Series(names["ncaa_id"].to_numpy(), index=normalize_name(names["team"])),
+    ])
+    by_name = by_name[by_name.index.notna() & ~by_name.index.duplicated()]
+
+    ncaa_id = normalize_name(stats_df["TEAM_NAME"]).map(by_name).astype("Int32")
+    info = _team_info(teams_df).reindex(ncaa_id)
+    joined = stats_df.assign(
+        NCAA_ID=ncaa_id.to_numpy(),
+        **{col.upper(): info[col].to_numpy() for col in TEAM_COLUMNS},
+    )
+    return _fill_levels(joined, ["CONFERENCE", "DIVISION"])
+
+
+def coverage(joined_stats: pd.DataFrame) -> dict:
+    """Righe delle statistiche collegate a ``teams.csv`` e squadre rimaste senza corrispondenza."""
+    matched = joined_stats["NCAA_ID"].notna()
+    missing = joined_stats.loc[~matched, "TEAM_NAME"].astype(object).value_counts()
+    return {"rows": len(joined_stats), "matched": int(matched.sum()), "unmatched_teams": missing.index.tolist()}
+
+
+class Rollup:
+    """Somme e conteggi di ``columns`` per ogni prefisso di ``levels`` (es. division, conference, ...)."""
+
+    def __init__(self, levels: list, columns: list):
+        self.levels = list(levels)
+        self.columns = list(columns)
+        self._sums = {depth: None for depth in range(1, len(self.levels) + 1)}
+        self._counts = dict(self._sums)
+        self._rows = dict(self._sums)
+        self._means = {}
+
+    def add(self, df: pd.DataFrame) -> "Rollup":
+        """Aggiunge righe: si aggiornano solo i gruppi a cui appartengono."""
+        return self._update(df, 1)
+
+    def remove(self, df: pd.DataFrame) -> "Rollup":
+        """Toglie righe aggiunte in precedenza (es. un file di roster rimosso)."""
+        return self._update(df, -1)
+
+    def copy(self) -> "Rollup":
+        """Rollup indipendente: le tabelle non vengono mai modificate sul posto, quindi si condividono."""
+        other = Rollup(self.levels, self.columns)
+        other._sums, other._counts, other._rows = dict(self._sums), dict(self._counts), dict(self._rows)
+        return other
+
+    def _update(self, df: pd.DataFrame, sign: int) -> "Rollup":
+        grouped = df.groupby(self.levels, observed=True, sort=False)
+        sums = grouped[self.columns].sum()
+        counts = grouped[self.columns].count()
+        rows = grouped.size()
+        for depth in self._sums:
+            if depth < len(self.levels):
+                level = list(range(depth))
+                part_sums = sums.groupby(level=level, observed=True).sum()
+                part_counts = counts.groupby(level=level, observed=True).sum()
+                part_rows = rows.groupby(level=level, observed=True).sum()
+            else:
+                part_sums, part_counts, part_rows = sums, counts, rows
+            self._sums[depth] = self._merge(self._sums[depth], part_sums, sign)
+            self._counts[depth] = self._merge(self._counts[depth], part_counts, sign)
+            self._rows[depth] = self._merge(self._rows[depth], part_rows, sign)
+            if sign < 0:
+                # Gruppi rimasti senza righe: spariscono come se non fossero mai stati aggiunti
+                kept = self._rows[depth] > 0
+                self._sums[depth] = self._sums[depth][kept]
+                self._counts[depth] = self._counts[depth][kept]
+                self._rows[depth] = self._rows[depth][kept]
+        self._means = {}
+        return self
+
+    @staticmethod
+    def _merge(current, part, sign=1):
+        if current is None:
+            return (part * sign).sort_index()
+        return current.add(part * sign, fill_value=0).sort_index()
+
+    def _depth(self, level: str) -> int:
+        return self.levels.index(level) + 1
+
+    def means(self, level: str) -> pd.DataFrame:
+        """Medie di ogni statistica per ``level`` (con i livelli superiori nell'indice) e righe contate."""
+        depth = self._depth(level)
+        if depth not in self._means:
+            means = self._sums[depth] / self._counts[depth].where(self._counts[depth] > 0)
+            self._means[depth] = means.assign(RIGHE=self._rows[depth].astype("int64"))
+        return self._means[depth]
+
+    def totals(self, level: str) -> pd.DataFrame:
+        """Somme di ogni statistica per ``level``."""
+        return self._sums[self._depth(level)]
+
+    def get(self, level: str, *keys) -> pd.DataFrame:
+        """Medie di ``level`` dentro il gruppo ``keys`` dei livelli superiori (es. una division)."""
+        means = self.means(level)
+        if not keys:
+            return means
+        try:
+            return means.xs(tuple(keys), level=list(range(len(keys))), drop_level=False)
+        except KeyError:
+            return means.iloc[:0]
+
+    def leaders(self, level: str, column: str, *keys, n: int = 10, known: bool = True) -> pd.DataFrame:
+        """Classifica dei gruppi di ``level`` per la media di ``column``, eventualmente dentro ``keys``.
+
+        Con ``known`` si escludono i gruppi ``"N/D"`` (squadre non collegate a
+        ``teams.csv``) dei livelli non fissati da ``keys``, a meno che ``keys``
+        non scelga proprio il gruppo ``"N/D"``.
+        """
+        ranked = self.get(level, *keys)
+        if known and UNKNOWN not in keys:
+            for position in range(len(keys), self._depth(level)):
+                ranked = ranked[ranked.index.get_level_values(position) != UNKNOWN]
+        return ranked.nlargest(n, column)
+
+
+def stats_rollup(joined_stats: pd.DataFrame) -> Rollup:
+    """Riepilogo gerarchico delle statistiche (colonne numeriche, metriche derivate comprese)."""
+    columns = [col for col in joined_stats.select_dtypes("number").columns if col not in ("NCAA_ID", "PLAYER_ID")]
+    return Rollup(STATS_LEVELS, columns).add(joined_stats)
+
+
+def roster_rollup(joined_roster: pd.DataFrame) -> Rollup:
+    """Riepilogo gerarchico del roster: giocatrici (righe) e altezza media, se disponibile."""
+    columns = [col for col in ["total_inches"] if col in joined_roster.columns]
+    return Rollup(ROSTER_LEVELS, columns).add(joined_roster)
@@ -0,0 +1,238 @@
+"""Archivio incrementale dei roster, partizionato per stagione.
+
+Aggiungere il CSV di una stagione aggiorna solo quella partizione: il flag
+``new_player``, i conteggi per squadra e i movimenti rispetto alla stagione
+precedente (vedi :mod:`wbb.transfers`) vengono ricalcolati soltanto per la
+stagione aggiunta e per quelle successive (le sole che dipendono da lei).
+"""
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from wbb import cache, ingest, transfers
+from wbb.lookup import GroupIndex
+
+_SEASON_RE = re.compile(r"(\d{4})[_-](\d{2,4})")
+
+
+def season_from_filename(filename: str):
+    """Stagione dal nome file (``wbb_rosters_2021_22.csv`` -> ``2021-22``), o ``None``."""
+    match = _SEASON_RE.search(Path(filename).stem)
+    if match is None:
+        return None
+    return f"{match.group(1)}-{match.group(2)[-2:]}"
+
+
+def piece_path(root, season: str, digest: str, archive: bool = False) -> Path:
+    """File Feather di una stagione di un file di roster dentro lo store su disco ``root``.
+
+    ``archive`` indica un file senza stagione dichiarata (stagioni dalla colonna ``season``).
+    """
+    suffix = "--archive" if archive else ""
+    return Path(root) / f"{re.sub(r'[^0-9A-Za-z.-]', '_', season)}--{digest}{suffix}.feather"
+
+
+def _file_key(key) -> tuple:
+    # Un file è identificato da (digest, stagione dichiarata): gli stessi byte caricati
+    # come stagioni diverse sono file diversi. Un digest da solo vale come archivio.
+    return tuple(key) if isinstance(key, tuple) else (key, None)
+
+
+class RosterStore:
+    """Roster di più stagioni, con flag e conteggi mantenuti per partizione.
+
+    Ogni file è identificato dalla coppia ``(digest, stagione)``, dove la
+    stagione è quella dichiarata in :meth:`add` (``None`` per gli archivi).
+    Se ``root`` è indicato, ogni file aggiunto viene salvato su disco in
+    formato Feather e ricaricato alla creazione dello store.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root) if root else None
+        self._pieces = {}       # stagione -> {(digest, stagione dichiarata): DataFrame}
+        self._partitions = {}   # stagione -> DataFrame con "new_player"
+        self._ids = {}          # stagione -> player_id presenti
+        self._team_counts = {}  # stagione -> conteggi per squadra
+        self._moves = {}        # stagione -> movimenti dalla stagione precedente
+        self._team_moves = {}   # stagione -> movimenti contati per squadra
+        self._frame = None
+        self._indexes = {}
+        if self.root is not None:
+            self._load()
+
+    def __contains__(self, key):
+        key = _file_key(key)
+        return any(key in pieces for pieces in self._pieces.values())
+
+    @property
+    def seasons(self):
+        return sorted(self._partitions)
+
+    @property
+    def files(self):
+        """Coppie ``(digest, stagione dichiarata)`` dei file contenuti."""
+        return {key for pieces in self._pieces.values() for key in pieces}
+
+    @property
+    def fingerprint(self) -> str:
+        """Impronta dei file contenuti e della stagione di ciascuno, utile come chiave di cache a valle.
+
+        Lo stesso file aggiunto come stagioni diverse dà impronte diverse.
+        """
+        pairs = sorted(f"{digest}@{declared}@{season}" for season, pieces in self._pieces.items()
+                       for digest, declared in pieces)
+        return ingest.file_digest(",".join(pairs).encode())
+
+    def add(self, df: pd.DataFrame, digest: str, season: str = None) -> list:
+        """Aggiunge un file di roster e restituisce le stagioni toccate.
+
+        Con ``season`` tutto il file appartiene a quella stagione (come per i
+        CSV annuali); senza, si usa la colonna ``season`` (file d'archivio con
+        più stagioni). Un file già presente (stesso digest e stessa stagione
+        dichiarata) è ignorato.
+        """
+        key = (digest, season)
+        if key in self:
+            return []
+        if season is not None:
+            df = df.assign(season=season)
+        elif "season" not in df.columns:
+            raise ValueError("Stagione non indicata e colonna 'season' assente")
+
+        seasons = []
+        for piece_season, piece in df.groupby(df["season"].astype(str), sort=True, observed=True):
+            self._pieces.setdefault(piece_season, {})[key] = piece.assign(season=piece_season)
+            if self.root is not None:
+                cache.write_frame(piece.assign(season=piece_season), self._piece_path(piece_season, key))
+            seasons.append(piece_season)
+        self._refresh(min(seasons))
+        return seasons
+
+    def copy(self) -> "RosterStore":
+        """Store indipendente (in memoria) che condivide i DataFrame con questo.
+
+        I DataFrame dello store non vengono mai modificati sul posto: aggiungere
+        o rimuovere file dalla copia non cambia l'originale.
+        """
+        other = RosterStore()
+        other._pieces = {season: dict(pieces) for season, pieces in self._pieces.items()}
+        other._partitions = dict(self._partitions)
+        other._ids = dict(self._ids)
+        other._team_counts = dict(self._team_counts)
+        other._moves = dict(self._moves)
+        other._team_moves = dict(self._team_moves)
+        other._frame = self._frame
+        other._indexes = dict(self._indexes)
+        return other
+
+    def remove(self, digest: str, season: str = None) -> None:
+        """Rimuove il file ``(digest, season)`` da tutte le stagioni a cui contribuiva."""
+        key = (digest, season)
+        touched = [piece_season for piece_season, pieces in self._pieces.items() if key in pieces]
+        for piece_season in touched:
+            del self._pieces[piece_season][key]
+            if self.root is not None:
+                self._piece_path(piece_season, key).unlink(missing_ok=True)
+            if not self._pieces[piece_season]:
+                del self._pieces[piece_season]
+        if touched:
+            self._refresh(min(touched))
+
+    def retain(self, files) -> None:
+        """Tiene solo i file in ``files``, coppie ``(digest, stagione)`` (es. quelli ancora caricati)."""
+        for digest, season in self.files - {_file_key(key) for key in files}:
+            self.remove(digest, season)
+
+    def frame(self) -> pd.DataFrame:
+        """Tutte le stagioni in un unico DataFrame (ricostruito solo dopo una modifica)."""
+        if self._frame is None:
+            parts = [self._partitions[season] for season in self.seasons]
+            self._frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        return self._frame
+
+    def index(self, column: str, normalize: bool = False) -> GroupIndex:
+        """Indice di :meth:`frame` per ``column``, ricostruito solo dopo una modifica."""
+        key = (column, normalize)
+        if key not in self._indexes:
+            self._indexes[key] = GroupIndex(self.frame(), column, normalize=normalize)
+        return self._indexes[key]
+
+    def pieces(self) -> dict:
+        """Parti dello store come ``{(stagione, digest): DataFrame}``, senza il flag ``new_player``."""
+        return {(season, digest): piece for season, pieces in self._pieces.items() for digest, piece in pieces.items()}
+
+    def partition(self, season: str) -> pd.DataFrame:
+        return self._partitions[season]
+
+    def team_counts(self) -> pd.DataFrame:
+        """Per stagione e squadra: nuove giocatrici (``new_player``) e totale (``player_id``)."""
+        parts = [self._team_counts[season] for season in self.seasons]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["season", "team", "new_player", "player_id"])
+
+    def moves(self) -> pd.DataFrame:
+        """Movimenti di tutte le stagioni che hanno una stagione precedente nello store."""
+        parts = [self._moves[season] for season in self.seasons if season in self._moves]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=transfers.MOVE_COLUMNS)
+
+    def team_moves(self) -> pd.DataFrame:
+        """Per stagione e squadra: confermate, arrivi, trasferimenti in entrata e in uscita, partenze."""
+        parts = [self._team_moves[season] for season in self.seasons if season in self._team_moves]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=transfers.TEAM_MOVE_COLUMNS)
+
+    def player_moves(self, player_id) -> pd.DataFrame:
+        """Storia dei movimenti di una giocatrice, stagione per stagione."""
+        if "moves" not in self._indexes:
+            self._indexes["moves"] = GroupIndex(self.moves(), "player_id")
+        return self._indexes["moves"].get(player_id)
+
+    def _refresh(self, from_season: str) -> None:
+        # Le stagioni precedenti a from_season non cambiano: ne riusiamo gli id
+        seen = pd.Index([])
+        for season, ids in self._ids.items():
+            if season < from_season:
+                seen = seen.union(ids)
+        for season in [s for s in self._partitions if s not in self._pieces]:
+            del self._partitions[season], self._ids[season], self._team_counts[season]
+            self._moves.pop(season, None)
+            self._team_moves.pop(season, None)
+
+        for season in sorted(s for s in self._pieces if s >= from_season):
+            part = pd.concat(self._pieces[season].values(), ignore_index=True)
+            ids = part["player_id"]
+            # Nuova = id noto, mai visto nelle stagioni precedenti né prima in questa
+            part["new_player"] = ids.notna() & ~ids.isin(seen) & ~part.duplicated(subset=["player_id"], keep="first")
+            self._partitions[season] = part
+            self._ids[season] = pd.Index(ids.dropna().unique())
+            self._team_counts[season] = (
+                part.groupby(["season", "team"], observed=True)
+                .agg(new_player=("new_player", "sum"), player_id=("player_id", "count"))
+                .reset_index()
+            )
+            # Movimenti rispetto alla stagione immediatamente precedente presente nello store
+            previous = [s for s in self._partitions if s < season]
+            if previous:
+                moves = transfers.season_moves(self._partitions[max(previous)], part, season)
+                self._moves[season] = moves
+                self._team_moves[season] = transfers.team_moves(moves)
+            else:
+                self._moves.pop(season, None)
+                self._team_moves.pop(season, None)
+            seen = seen.union(self._ids[season])
+        self._frame = None
+        self._indexes = {}
+
+    def _piece_path(self, season: str, key: tuple) -> Path:
+        digest, declared = key
+        return piece_path(self.root, season, digest, archive=declared is None)
+
+    def _load(self) -> None:
+        if not self.root.exists():
+            return
+        for path in sorted(self.root.glob("*--*.feather")):
+            piece = cache.read_frame(path)
+            season, name = str(piece["season"].iloc[0]), path.stem.split("--", 1)[1]
+            digest, archive = name.removesuffix("--archive"), name.endswith("--archive")
+            self._pieces.setdefault(season, {})[(digest, None if archive else season)] = piece
+        if self._pieces:
+            self._refresh(min(self._pieces))
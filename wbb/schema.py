@@ -0,0 +1,80 @@
+"""Tipi compatti delle colonne per roster, statistiche e squadre.
+
+Le stringhe ripetute diventano categorie, numeri e id usano il tipo più
+piccolo che li contiene e le colonne che nessun grafico usa vengono scartate.
+"""
+import pandas as pd
+
+# Da incrementare quando cambia lo schema: invalida la cache su disco
+SCHEMA_VERSION = 3
+
+ROSTER_DTYPES = {
+    "ncaa_id": "Int32",
+    "player_id": "Int32",
+    "team": "category",
+    "conference": "category",
+    "division": "category",
+    "team_state": "category",
+    "season": "category",
+    "year": "category",
+    "year_clean": "category",
+    "hometown": "category",
+    "homestate": "category",
+    "hometown_clean": "category",
+    "hs_clean": "category",
+    "previous_school_clean": "category",
+    "height_clean": "category",
+    "jersey": "category",
+    "position": "category",
+    "primary_position": "category",
+    "secondary_position": "category",
+    "position_clean": "category",
+    "state_clean": "category",
+    "country_clean": "category",
+    "redshirt": "Int8",
+    "total_inches": "float32",
+}
+
+STATS_DTYPES = {
+    "TEAM_NAME": "category",
+}
+
+TEAMS_DTYPES = {
+    "ncaa_id": "Int32",
+    "conference": "category",
+    "division": "category",
+    "team_state": "category",
+}
+
+SCHEMAS = {"roster": ROSTER_DTYPES, "stats": STATS_DTYPES, "teams": TEAMS_DTYPES}
+
+# Colonne non usate da nessun grafico (``high_school`` è la versione grezza di ``hs_clean``)
+DROP_COLUMNS = {
+    "roster": ["url", "high_school"],
+    "stats": [],
+    "teams": ["url", "twitter"],
+}
+
+_NUMERIC_KINDS = {"Int8", "Int16", "Int32", "Int64", "int32", "float32", "float64"}
+
+
+def enforce(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """Converte le colonne di ``df`` nei tipi previsti per ``kind`` e scarta quelle inutili.
+
+    Le colonne assenti vengono ignorate. Per le statistiche le colonne
+    numeriche non elencate diventano ``float32`` (``int32`` se intere).
+    """
+    df = df.drop(columns=DROP_COLUMNS[kind], errors="ignore")
+    dtypes = dict(SCHEMAS[kind])
+    if kind == "stats":
+        for col in df.select_dtypes("number").columns:
+            dtypes.setdefault(col, "int32" if pd.api.types.is_integer_dtype(df[col].dtype) else "float32")
+
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        if dtype in _NUMERIC_KINDS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
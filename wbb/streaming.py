@@ -0,0 +1,291 @@
+"""Lettura a blocchi di file di roster e statistiche molto grandi.
+
+I file vengono letti ``chunksize`` righe alla volta: ogni blocco viene pulito
+e convertito nello schema compatto (:mod:`wbb.schema`), scritto su disco in
+formato Feather e usato per aggiornare aggregati additivi (conteggi, somme,
+quadrati, massimi). Il file intero non è mai in memoria: il picco dipende
+dalla dimensione del blocco e dal numero di gruppi, non dal numero di righe.
+
+Gli aggregati bastano ai grafici della dashboard che non hanno bisogno delle
+singole righe: box plot delle altezze, nuove giocatrici e turnover per
+squadra, mappa per stato, riepiloghi per giocatrice e squadra, rollup per
+conference e division.
+
+Da riga di comando::
+
+    python -m wbb.streaming roster archivio_roster.csv --store .cache/rosters --teams data/teams.csv
+    python -m wbb.streaming stats game_logs.xlsx --store .cache/stats --teams data/teams.csv
+"""
+import argparse
+import itertools
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from wbb import aggregates, cache, charts, ingest, metrics, profiling, rollups, rosters, schema
+
+DEFAULT_CHUNKSIZE = 50_000
+
+
+def _infer_numbers(df: pd.DataFrame) -> pd.DataFrame:
+    # Numeri salvati come testo nel foglio: convertiti come farebbe pd.read_excel
+    for col in df.columns:
+        numbers = pd.to_numeric(df[col], errors="coerce")
+        if numbers.notna().sum() == df[col].notna().sum():
+            df[col] = numbers
+    return df
+
+
+def _excel_chunks(source, chunksize: int):
+    # openpyxl in sola lettura scorre il foglio riga per riga senza caricarlo tutto
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(col) for col in next(rows, ())]
+        while batch := list(itertools.islice(rows, chunksize)):
+            yield _infer_numbers(pd.DataFrame(batch, columns=header))
+    finally:
+        workbook.close()
+
+
+def _is_csv(source) -> bool:
+    return str(getattr(source, "name", source)).lower().endswith(".csv")
+
+
+def roster_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Blocchi di un CSV di roster, con colonne in minuscolo e tipi compatti."""
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        yield schema.enforce(ingest.normalize_columns(chunk, "lower"), "roster")
+
+
+def stats_chunks(source, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Blocchi di un file di statistiche (Excel o CSV), con colonne in MAIUSCOLO.
+
+    Si aggiungono solo le metriche di riga (:func:`wbb.metrics.add_row_metrics`):
+    streak e momentum dipendono dalle partite precedenti della giocatrice,
+    che possono stare in un altro blocco.
+    """
+    reader = pd.read_csv(source, chunksize=chunksize) if _is_csv(source) else _excel_chunks(source, chunksize)
+    for chunk in reader:
+        yield schema.enforce(metrics.add_row_metrics(ingest.normalize_columns(chunk, "upper")), "stats")
+
+
+def _add_counts(current, part: pd.Series) -> pd.Series:
+    return part if current is None else current.add(part, fill_value=0)
+
+
+def _text(values: pd.Series) -> pd.Series:
+    # I blocchi hanno categorie diverse: le chiavi degli aggregati sono testo semplice
+    return values.astype(object).where(values.notna())
+
+
+class RosterAggregates:
+    """Aggregati del roster aggiornati blocco per blocco.
+
+    Si conservano solo conteggi e la prima apparizione di ogni ``player_id``,
+    quindi la memoria cresce con giocatrici e squadre, non con le righe. Con
+    ``teams_df`` si aggiorna anche il rollup division → conference → squadra.
+    """
+
+    def __init__(self, teams_df: pd.DataFrame = None):
+        self.rows = 0
+        self._first = pd.DataFrame(columns=["player_id", "season", "team"])  # prima apparizione per id
+        self._players = None  # (stagione, squadra) -> righe con player_id
+        self._states = None   # stato -> giocatrici
+        self._heights = None  # (stagione, pollici) -> giocatrici
+        self._teams = teams_df
+        self.rollup = None
+
+    def add(self, chunk: pd.DataFrame) -> "RosterAggregates":
+        """Aggiorna gli aggregati con un blocco che ha già la colonna ``season``."""
+        season, team = chunk["season"].astype(str), _text(chunk["team"])
+        known = chunk["player_id"].notna()
+        self.rows += len(chunk)
+
+        # Nuova giocatrice = prima riga nella stagione più vecchia in cui compare (come RosterStore)
+        first = pd.DataFrame({"player_id": chunk["player_id"], "season": season, "team": team})[known]
+        first = pd.concat([self._first, first], ignore_index=True)
+        self._first = first.sort_values("season", kind="stable").drop_duplicates("player_id")
+
+        self._players = _add_counts(self._players, known.groupby([season, team]).sum())
+        if "state_clean" in chunk.columns:
+            self._states = _add_counts(self._states, _text(chunk["state_clean"]).value_counts())
+        if "total_inches" in chunk.columns:
+            heights = pd.DataFrame({"season": season, "total_inches": chunk["total_inches"]}).dropna()
+            self._heights = _add_counts(self._heights, heights.groupby(["season", "total_inches"]).size())
+        if self._teams is not None:
+            joined = rollups.join_roster(chunk.assign(team=team.astype("category")), self._teams)
+            if self.rollup is None:
+                self.rollup = rollups.roster_rollup(joined)
+            else:
+                self.rollup.add(joined)
+        return self
+
+    def team_counts(self) -> pd.DataFrame:
+        """Come :meth:`wbb.rosters.RosterStore.team_counts`: nuove giocatrici e totale per stagione e squadra."""
+        if self._players is None:
+            return pd.DataFrame(columns=["season", "team", "new_player", "player_id"])
+        new = self._first.groupby(["season", "team"]).size()
+        counts = pd.DataFrame({"player_id": self._players})
+        counts["new_player"] = new.reindex(counts.index, fill_value=0)
+        counts = counts.rename_axis(["season", "team"]).reset_index()
+        return counts[["season", "team", "new_player", "player_id"]].astype({"new_player": "int64", "player_id": "int64"})
+
+    def state_counts(self) -> pd.DataFrame:
+        """Come :func:`wbb.charts.state_counts`: giocatrici per stato."""
+        counts = self._states if self._states is not None else pd.Series(dtype="int64")
+        return counts.astype("int64").sort_values(ascending=False).rename_axis("state_clean").reset_index(name="giocatrici")
+
+    def height_box(self) -> pd.DataFrame:
+        """Quartili e baffi delle altezze per stagione (vedi :func:`wbb.charts.box_stats_from_counts`)."""
+        return charts.box_stats_from_counts(self._heights if self._heights is not None else pd.Series(dtype="int64"))
+
+
+class RunningSummary:
+    """Come :func:`wbb.aggregates.summarize`, ma aggiornata blocco per blocco.
+
+    Per ogni gruppo si tengono somma, somma dei quadrati, conteggio e massimo
+    di ogni statistica numerica; media e deviazione standard si ricavano alla
+    lettura.
+    """
+
+    def __init__(self, by: str):
+        self.by = by
+        self._sum = self._squares = self._count = self._max = None
+
+    def add(self, chunk: pd.DataFrame) -> "RunningSummary":
+        numeric = chunk.select_dtypes("number").astype("float64")
+        grouped = numeric.groupby(_text(chunk[self.by]))
+        parts = grouped.sum(), (numeric ** 2).groupby(grouped.keys).sum(), grouped.count(), grouped.max()
+        if self._sum is None:
+            self._sum, self._squares, self._count, self._max = parts
+        else:
+            self._sum = self._sum.add(parts[0], fill_value=0)
+            self._squares = self._squares.add(parts[1], fill_value=0)
+            self._count = self._count.add(parts[2], fill_value=0)
+            self._max = pd.concat([self._max, parts[3]]).groupby(level=0).max()
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """Tabella con colonne ``(aggregazione, statistica)`` come :func:`wbb.aggregates.summarize`."""
+        count = self._count.where(self._count > 0)
+        mean = self._sum / count
+        # Varianza campionaria (ddof=1, come pandas); gli arrotondamenti negativi diventano 0
+        variance = ((self._squares - self._sum * mean) / (count - 1)).clip(lower=0)
+        parts = {"mean": mean, "std": np.sqrt(variance), "max": self._max, "count": self._count.astype("int64")}
+        summary = pd.concat([parts[agg] for agg in aggregates.AGGREGATIONS], axis=1, keys=aggregates.AGGREGATIONS)
+        return summary.rename_axis(self.by).sort_index(axis=1, level=0, sort_remaining=False)
+
+
+def stream_roster(source, digest: str, root=None, season: str = None, teams_df: pd.DataFrame = None,
+                  chunksize: int = DEFAULT_CHUNKSIZE, into: RosterAggregates = None) -> RosterAggregates:
+    """Legge un CSV di roster a blocchi e ne restituisce gli aggregati.
+
+    Con ``root`` ogni blocco viene scritto nello store su disco, una parte
+    per stagione (``<stagione>--<digest>-<blocco>.feather``), così
+    ``RosterStore(root)`` può ricaricarlo. ``season`` e la colonna ``season``
+    funzionano come in :meth:`wbb.rosters.RosterStore.add`; con ``into`` si
+    aggiornano aggregati esistenti (più file nello stesso riepilogo).
+    """
+    result = into if into is not None else RosterAggregates(teams_df)
+    for number, chunk in enumerate(roster_chunks(source, chunksize)):
+        if season is not None:
+            chunk = chunk.assign(season=season)
+        elif "season" not in chunk.columns:
+            raise ValueError("Stagione non indicata e colonna 'season' assente")
+        if root is not None:
+            for piece_season, piece in chunk.groupby(chunk["season"].astype(str), sort=True, observed=True):
+                path = rosters.piece_path(root, piece_season, f"{digest}-{number:05d}", archive=season is None)
+                with profiling.timed("stream.write", kind="io"):
+                    cache.write_frame(piece.assign(season=piece_season), path)
+        with profiling.timed("stream.aggregate"):
+            result.add(chunk)
+    return result
+
+
+def stream_stats(source, digest: str, root=None, chunksize: int = DEFAULT_CHUNKSIZE,
+                 teams_df: pd.DataFrame = None) -> dict:
+    """Legge un file di statistiche a blocchi: riepiloghi per giocatrice e per squadra.
+
+    Con ``root`` ogni blocco viene scritto in ``stats--<digest>-<blocco>.feather``
+    e si rilegge con :func:`read_stats_store`. Con ``teams_df`` si aggiungono il
+    rollup division → conference → squadra → giocatrice e la copertura del
+    collegamento con ``teams.csv`` (come :func:`wbb.rollups.coverage`).
+    """
+    players, teams = RunningSummary("PLAYER_NAME"), RunningSummary("TEAM_NAME")
+    rows = matched = 0
+    rollup = missing = None
+    for number, chunk in enumerate(stats_chunks(source, chunksize)):
+        if root is not None:
+            with profiling.timed("stream.write", kind="io"):
+                cache.write_frame(chunk, stats_piece_path(root, digest, number))
+        with profiling.timed("stream.aggregate"):
+            players.add(chunk)
+            teams.add(chunk)
+            if teams_df is not None:
+                joined = rollups.join_stats(chunk, teams_df)
+                if rollup is None:
+                    rollup = rollups.stats_rollup(joined)
+                else:
+                    rollup.add(joined.reindex(columns=joined.columns.union(rollup.columns, sort=False)))
+                known = joined["NCAA_ID"].notna()
+                matched += int(known.sum())
+                missing = _add_counts(missing, _text(joined.loc[~known, "TEAM_NAME"]).value_counts())
+        rows += len(chunk)
+    result = {"rows": rows, "players": players.summary(), "teams": teams.summary()}
+    if teams_df is not None:
+        missing = missing[missing > 0] if missing is not None else pd.Series(dtype="int64")
+        result["rollup"] = rollup
+        result["coverage"] = {"rows": rows, "matched": matched,
+                              "unmatched_teams": missing.sort_values(ascending=False, kind="stable").index.tolist()}
+    return result
+
+
+def stats_piece_path(root, digest: str, number: int) -> Path:
+    """File Feather del blocco ``number`` di un file di statistiche nello store ``root``."""
+    return Path(root) / f"stats--{digest}-{number:05d}.feather"
+
+
+def read_stats_store(root, digest: str) -> pd.DataFrame:
+    """Rilegge (con memory mapping) i blocchi di un file di statistiche scritti da :func:`stream_stats`."""
+    paths = sorted(Path(root).glob(f"stats--{digest}-*.feather"))
+    if not paths:
+        raise FileNotFoundError(f"Nessun blocco per {digest} in {root}")
+    return pd.concat([cache.read_frame(path) for path in paths], ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Legge a blocchi un file di roster o di statistiche molto grande.")
+    parser.add_argument("kind", choices=["roster", "stats"], help="Tipo di file")
+    parser.add_argument("path", help="File CSV (roster o statistiche) o Excel (statistiche)")
+    parser.add_argument("--store", default=None, help="Cartella in cui scrivere i blocchi in formato Feather")
+    parser.add_argument("--season", default=None, help="Stagione del file di roster (default: dal nome o dalla colonna)")
+    parser.add_argument("--teams", default=None, help="teams.csv, per il rollup per conference e division")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Righe per blocco")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path)
+    digest = ingest.path_digest(path)
+    if args.kind == "roster":
+        teams_df = ingest.read_teams(Path(args.teams).read_bytes()) if args.teams else None
+        season = args.season or rosters.season_from_filename(path.name)
+        result = stream_roster(path, digest, args.store, season, teams_df, args.chunksize)
+        print(f"{result.rows} righe, {len(result.team_counts())} squadre-stagione")
+        heights = result.height_box()
+        if not heights.empty:
+            print(heights.to_string())
+    else:
+        teams_df = ingest.read_teams(Path(args.teams).read_bytes()) if args.teams else None
+        result = stream_stats(path, digest, args.store, args.chunksize, teams_df)
+        print(f"{result['rows']} righe, {len(result['players'])} giocatrici, {len(result['teams'])} squadre")
+        if teams_df is not None:
+            matched = result["coverage"]
+            print(f"{matched['matched']} righe collegate a teams.csv, "
+                  f"{len(matched['unmatched_teams'])} squadre senza corrispondenza")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Pool condiviso per i calcoli pesanti, con deduplicazione delle richieste.
+
+Ogni calcolo è identificato da una chiave (grafico, selezione, impronta dei
+dati). Se la stessa chiave è già in corso o già pronta si restituisce lo
+stesso ``Future``: dieci sessioni che aprono la stessa squadra fanno partire un
+solo calcolo. I risultati completati restano disponibili fino a
+``max_entries``; quelli falliti vengono dimenticati, così la richiesta
+successiva riprova.
+
+Si usano thread e non processi: i calcoli leggono DataFrame già in memoria e
+condivisi, che con un pool di processi andrebbero serializzati a ogni
+richiesta. KMeans (scikit-learn) e numpy rilasciano il GIL nelle parti pesanti.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def timed_call(fn, *args, **kwargs):
+    """``(fn(*args, **kwargs), secondi)``: il tempo di calcolo misurato nel thread che lo esegue."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class TaskPool:
+    """Esegue ``fn`` in background una sola volta per chiave."""
+
+    def __init__(self, max_workers: int = None, max_entries: int = 128):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wbb-task")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.submitted = 0
+        self.reused = 0
+
+    def submit(self, key, fn, *args, **kwargs) -> Future:
+        """``Future`` del calcolo ``key``: riusa quello in corso o già completato, se c'è."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                self._futures.move_to_end(key)
+                self.reused += 1
+                return future
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._futures[key] = future
+            self.submitted += 1
+            self._evict()
+        future.add_done_callback(lambda done: self._forget_failed(key, done))
+        return future
+
+    def __contains__(self, key):
+        return key in self._futures
+
+    def _evict(self):
+        # Si scartano i risultati completati meno usati di recente; quelli in corso restano
+        excess = len(self._futures) - self.max_entries
+        for key in [key for key, future in self._futures.items() if future.done()][:max(excess, 0)]:
+            del self._futures[key]
+
+    def _forget_failed(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
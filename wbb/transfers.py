@@ -0,0 +1,80 @@
+"""Movimenti delle giocatrici tra una stagione e la successiva.
+
+Per ogni coppia di stagioni consecutive si confrontano i roster per
+``player_id`` una volta sola; il risultato (una riga per giocatrice e
+movimento) viene conservato e letto dai grafici, senza rifare il join.
+
+Stati possibili:
+
+- ``retained``: stessa squadra nelle due stagioni;
+- ``transfer``: squadra diversa, oppure giocatrice nuova con
+  ``previous_school_clean`` (trasferita da una scuola fuori dai dati);
+- ``arriving``: giocatrice nuova senza scuola precedente;
+- ``departing``: presente nella stagione prima e assente in questa.
+"""
+import pandas as pd
+
+STATUSES = ["retained", "transfer", "arriving", "departing"]
+
+# ``in_previous``: la giocatrice era nel roster della stagione precedente (``from_school`` è una squadra dei dati)
+MOVE_COLUMNS = ["season", "player_id", "name", "status", "from_school", "to_school", "in_previous"]
+TEAM_MOVE_COLUMNS = ["season", "team", "retained", "arriving", "transfer_in", "transfer_out", "departing"]
+
+
+def _players(roster: pd.DataFrame) -> pd.DataFrame:
+    """Una riga per ``player_id`` noto, con nome, squadra e scuola precedente come testo."""
+    columns = [col for col in ["player_id", "name", "team", "previous_school_clean"] if col in roster.columns]
+    players = roster.loc[roster["player_id"].notna(), columns].drop_duplicates("player_id")
+    return players.astype({col: object for col in columns if col != "player_id"}).set_index("player_id")
+
+
+def season_moves(previous: pd.DataFrame, current: pd.DataFrame, season: str) -> pd.DataFrame:
+    """Movimenti da ``previous`` a ``current`` (roster di due stagioni consecutive)."""
+    before, after = _players(previous), _players(current)
+    unknown = current[current["player_id"].isna()]
+
+    stayed = after.index.intersection(before.index)
+    same_team = after.loc[stayed, "team"].to_numpy() == before.loc[stayed, "team"].to_numpy()
+    new = after.drop(stayed)
+    if "previous_school_clean" in new.columns:
+        new_school = new["previous_school_clean"]
+    else:
+        new_school = pd.Series(None, index=new.index, dtype=object)
+    left = before.drop(stayed)
+
+    parts = [
+        pd.DataFrame({"player_id": stayed, "name": after.loc[stayed, "name"].to_numpy(),
+                      "status": ["retained" if same else "transfer" for same in same_team],
+                      "from_school": before.loc[stayed, "team"].to_numpy(),
+                      "to_school": after.loc[stayed, "team"].to_numpy(), "in_previous": True}),
+        pd.DataFrame({"player_id": new.index, "name": new["name"].to_numpy(),
+                      "status": ["transfer" if pd.notna(school) else "arriving" for school in new_school],
+                      "from_school": new_school.to_numpy(), "to_school": new["team"].to_numpy(),
+                      "in_previous": False}),
+        # Senza player_id non si può seguire la giocatrice: conta come arrivo
+        pd.DataFrame({"player_id": unknown["player_id"].to_numpy(), "name": unknown["name"].astype(object).to_numpy(),
+                      "status": "arriving", "from_school": None, "to_school": unknown["team"].astype(object).to_numpy(),
+                      "in_previous": False}),
+        pd.DataFrame({"player_id": left.index, "name": left["name"].to_numpy(), "status": "departing",
+                      "from_school": left["team"].to_numpy(), "to_school": None, "in_previous": True}),
+    ]
+    moves = pd.concat([part for part in parts if len(part)], ignore_index=True)
+    moves = moves.reindex(columns=MOVE_COLUMNS[1:]).assign(season=season)[MOVE_COLUMNS]
+    return moves.astype({"player_id": "Int32", "status": pd.CategoricalDtype(STATUSES)})
+
+
+def team_moves(moves: pd.DataFrame) -> pd.DataFrame:
+    """Per stagione e squadra: confermate, arrivi, trasferimenti in entrata e in uscita, partenze."""
+    incoming = moves[moves["status"] != "departing"]
+    outgoing = moves[moves["status"].isin(["transfer", "departing"]) & moves["in_previous"]]
+    counts = pd.concat([
+        incoming.groupby(["season", "to_school", "status"], observed=True).size()
+        .rename_axis(["season", "team", "status"]).unstack(fill_value=0)
+        .rename(columns={"transfer": "transfer_in"}),
+        outgoing.groupby(["season", "from_school", "status"], observed=True).size()
+        .rename_axis(["season", "team", "status"]).unstack(fill_value=0)
+        .rename(columns={"transfer": "transfer_out"}),
+    ], axis=1)
+    counts = counts.reindex(columns=TEAM_MOVE_COLUMNS[2:]).fillna(0).astype("int32")
+    counts.columns.name = None
+    return counts.reset_index()